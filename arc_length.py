@@ -0,0 +1,103 @@
+from __future__ import annotations
+import numpy as np
+from numpy.polynomial.legendre import leggauss
+from scipy.special import comb
+
+""" Arc length parameterization of bezier curves (line segment, quadratic, cubic)
+Cumulative length in ARC_LENGTH_INTERVALS equal t intervals by Gauss-Legendre quadrature of speed,
+inverse lookup from length to t is binary search of interval and Newton iterations inside it """
+
+ARC_LENGTH_INTERVALS = 32
+GAUSS_LEGENDRE_ORDER = 8
+ARC_LENGTH_NEWTON_ITERATIONS = 3
+
+_nodes, _weights = leggauss(GAUSS_LEGENDRE_ORDER)
+GAUSS_LEGENDRE_NODES = 0.5 * (_nodes + 1)  # on [0, 1]
+GAUSS_LEGENDRE_WEIGHTS = 0.5 * _weights
+
+
+def bernstein(t, degree: int) -> np.ndarray:
+    """ Bernstein basis (..., degree + 1) """
+    t = np.asarray(t, dtype=float)[..., None]
+    i = np.arange(degree + 1)
+    return comb(degree, i) * t ** i * (1 - t) ** (degree - i)
+
+
+class ArcLengthTable:
+    def __init__(self, control_points: np.ndarray, intervals: int = ARC_LENGTH_INTERVALS):
+        """ control_points (degree + 1, 2), degree 1, 2 or 3 """
+        self.control_points = np.asarray(control_points, dtype=float)
+        self.degree = len(self.control_points) - 1
+        self.derivative_points = self.degree * np.diff(self.control_points, axis=0)
+        self.t_table = np.linspace(0, 1, intervals + 1)
+        interval_lengths = self.integrate_speed(self.t_table[:-1], self.t_table[1:])
+        self.length_table = np.concatenate(([0.], np.cumsum(interval_lengths)))
+
+    @property
+    def length(self) -> float:
+        return float(self.length_table[-1])
+
+    def point(self, t) -> np.ndarray:
+        """ (..., 2) """
+        return bernstein(t, self.degree) @ self.control_points
+
+    def derivative(self, t) -> np.ndarray:
+        """ (..., 2) """
+        return bernstein(t, self.degree - 1) @ self.derivative_points
+
+    def speed(self, t) -> np.ndarray:
+        return np.linalg.norm(self.derivative(t), axis=-1)
+
+    def integrate_speed(self, t_start, t_end) -> np.ndarray:
+        """ arc length between t_start and t_end (arrays of same shape) """
+        t_start, t_end = np.asarray(t_start, dtype=float), np.asarray(t_end, dtype=float)
+        step = t_end - t_start
+        nodes = t_start[..., None] + step[..., None] * GAUSS_LEGENDRE_NODES
+        return step * (self.speed(nodes) @ GAUSS_LEGENDRE_WEIGHTS)
+
+    def length_at(self, t) -> np.ndarray:
+        """ arc length from start to parameter t """
+        t = np.clip(np.asarray(t, dtype=float), 0, 1)
+        k = np.clip(np.searchsorted(self.t_table, t, side="right") - 1, 0, len(self.t_table) - 2)
+        return self.length_table[k] + self.integrate_speed(self.t_table[k], t)
+
+    def t_at(self, length) -> np.ndarray:
+        """ parameter t of point on given arc length from start, O(log intervals) per query """
+        length = np.clip(np.asarray(length, dtype=float), 0, self.length)
+        k = np.clip(np.searchsorted(self.length_table, length, side="right") - 1, 0, len(self.t_table) - 2)
+        t_start, t_end = self.t_table[k], self.t_table[k + 1]
+        interval_length = self.length_table[k + 1] - self.length_table[k]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = t_start + (t_end - t_start) * np.where(interval_length > 0,
+                                                       (length - self.length_table[k]) / interval_length, 0)
+        for _ in range(ARC_LENGTH_NEWTON_ITERATIONS):
+            speed = self.speed(t)
+            error = self.length_table[k] + self.integrate_speed(t_start, t) - length
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = np.where(speed > 0, np.clip(t - error / speed, t_start, t_end), t)
+        return t
+
+    def point_at(self, length) -> np.ndarray:
+        return self.point(self.t_at(length))
+
+    def angle_at(self, length) -> np.ndarray:
+        """ tangent angle in radians """
+        derivative = self.derivative(self.t_at(length))
+        return np.arctan2(derivative[..., 1], derivative[..., 0])
+
+
+if __name__ == "__main__":
+    test_1 = True
+    if test_1:
+        # length matches dense polyline, t_at inverts length_at
+        for control in [np.array([[0, 0], [3, 4]]), np.array([[1, 1], [2, 2], [3, 1]]),
+                        np.array([[0, 0], [300, 0], [0, 300], [300, 300]]),
+                        np.array([[0, 0], [1000, 1000], [0, 1000], [10, 0]])]:
+            table = ArcLengthTable(control)
+            dense = table.point(np.linspace(0, 1, 200001))
+            dense_length = np.sum(np.linalg.norm(np.diff(dense, axis=0), axis=-1))
+            lengths = np.linspace(0, table.length, 101)
+            inverse_error = np.max(np.abs(table.length_at(table.t_at(lengths)) - lengths))
+            print("length", table.length, dense_length, "inverse error", inverse_error)
+            assert abs(table.length - dense_length) < 1e-6 * table.length
+            assert inverse_error < 1e-6 * table.length
@@ -0,0 +1,218 @@
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import platform
+import time
+from typing import Callable
+
+import numpy as np
+import scipy
+
+from cubic_curvature import deltas_optimization, batch_deltas_optimization, exact_max_curvature, GRADIENT_METHODS, \
+    HAND_PICKED_CASES
+from deltas_table import table_deltas
+
+""" Benchmark of connector curve optimization
+Runs hand-picked curves of cubic_curvature and seeded random endpoints and angles through solvers,
+reports wall time, nfev and achieved max curvature in units of 1 / chord length (scale free quality).
+Committed JSON baseline has only nfev and curvature, timings are machine dependent, so they are compared
+with local timing baseline, which is saved on the same machine and python """
+
+BENCHMARK_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+BENCHMARK_TIMING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_timing.local.json")
+BENCHMARK_SEED = 0
+BENCHMARK_RANDOM_CASES = 40
+BENCHMARK_REPEATS = 3
+BENCHMARK_TIME_TOLERANCE = 1.2  # slower than baseline by this factor is reported as regression
+BENCHMARK_CURVATURE_TOLERANCE = 1e-3  # relative excess of max curvature over baseline reported as regression
+TIMING_KEYS = ("time", "total_time", "median_time", "max_time")
+MACHINE_KEYS = ("machine", "node", "python")  # timings are compared only if these are the same
+
+
+def benchmark_cases(random_cases: int = BENCHMARK_RANDOM_CASES, seed: int = BENCHMARK_SEED) -> np.ndarray:
+    """ geometry rows (x0, y0, x3, y3, ang0, ang3) with angles in [0, 2pi) as UniversalConnectionCurve.geometry """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 1e+3, (random_cases, 4))
+    angles = rng.uniform(0, 2 * math.pi, (random_cases, 2))
+    cases = np.vstack([np.array(HAND_PICKED_CASES, dtype=float), np.hstack([points, angles])])
+    cases[:, 4:] %= 2 * math.pi
+    return cases
+
+
+def table_solver(*args):
+    """ table lookup with Nelder-Mead fallback, as UniversalConnectionCurve.solve without cache """
+    deltas = table_deltas(*args)
+    if deltas is None:
+        return deltas_optimization(*args)
+    return scipy.optimize.OptimizeResult(x=np.array(deltas), nfev=0, source="table")
+
+
+def single_solvers() -> dict[str, Callable]:
+    solvers = {"Nelder-Mead": deltas_optimization, "table": table_solver}
+    for method in GRADIENT_METHODS:
+        solvers[method] = lambda *args, method=method: deltas_optimization(*args, method=method)
+    return solvers
+
+
+def chord_curvature(deltas, case) -> float:
+    return float(exact_max_curvature(deltas, *case)[0] * math.hypot(case[2] - case[0], case[3] - case[1]))
+
+
+def run_single_solver(solver: Callable, cases: np.ndarray, repeats: int) -> dict:
+    times, nfevs, curvatures = [], [], []
+    for case in cases:
+        case = tuple(float(val) for val in case)
+        best_time = np.inf
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            res = solver(*case)
+            best_time = min(best_time, time.perf_counter() - start_time)
+        times.append(best_time)
+        nfevs.append(int(res.nfev))
+        curvatures.append(chord_curvature(res.x, case))
+    return {"time": times, "nfev": nfevs, "curvature": curvatures}
+
+
+def run_batch_solver(cases: np.ndarray, repeats: int) -> dict:
+    """ vectorized solver, time of whole batch is shared equally between cases, nfev is not counted """
+    best_time = np.inf
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        deltas = batch_deltas_optimization(cases)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return {"time": [best_time / len(cases)] * len(cases), "nfev": [None] * len(cases),
+            "curvature": [chord_curvature(case_deltas, case) for case_deltas, case in zip(deltas, cases)]}
+
+
+def summary(result: dict) -> dict:
+    nfevs = [nfev for nfev in result["nfev"] if nfev is not None]
+    return {"total_time": float(np.sum(result["time"])), "median_time": float(np.median(result["time"])),
+            "max_time": float(np.max(result["time"])), "mean_nfev": float(np.mean(nfevs)) if nfevs else None,
+            "mean_curvature": float(np.mean(result["curvature"]))}
+
+
+def run_benchmark(solver_names: list[str] = None, random_cases: int = BENCHMARK_RANDOM_CASES,
+                  seed: int = BENCHMARK_SEED, repeats: int = BENCHMARK_REPEATS) -> dict:
+    """ solver_names from single_solvers and "batch", all by default """
+    cases = benchmark_cases(random_cases, seed)
+    solvers = single_solvers()
+    if solver_names is None:
+        solver_names = list(solvers) + ["batch"]
+    results = {}
+    for name in solver_names:
+        if name == "batch":
+            results[name] = run_batch_solver(cases, repeats)
+        else:
+            results[name] = run_single_solver(solvers[name], cases, repeats)
+        results[name]["summary"] = summary(results[name])
+    return {"meta": {"seed": seed, "random_cases": random_cases, "repeats": repeats,
+                     "python": platform.python_version(), "numpy": np.__version__, "scipy": scipy.__version__,
+                     "machine": platform.machine(), "node": platform.node(),
+                     "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+            "cases": cases.tolist(), "solvers": results}
+
+
+def quality_baseline(report: dict) -> dict:
+    """ report without timings and machine, which is committed """
+    meta = {key: val for key, val in report["meta"].items() if key != "node"}
+    solvers = {}
+    for name, result in report["solvers"].items():
+        solvers[name] = {key: val for key, val in result.items() if key not in TIMING_KEYS}
+        solvers[name]["summary"] = {key: val for key, val in result["summary"].items() if key not in TIMING_KEYS}
+    return {"meta": meta, "cases": report["cases"], "solvers": solvers}
+
+
+def save_baseline(report: dict, path: str = BENCHMARK_BASELINE_FILE):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def load_baseline(path: str = BENCHMARK_BASELINE_FILE) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def same_machine(report: dict, baseline: dict) -> bool:
+    return all(report["meta"][key] == baseline["meta"].get(key) for key in MACHINE_KEYS)
+
+
+def has_timing(baseline: dict, name: str) -> bool:
+    return "total_time" in baseline["solvers"][name]["summary"]
+
+
+def compare(report: dict, baseline: dict, compare_curvature: bool = True) -> list[str]:
+    """ returns regressions of report against baseline: cases with higher max curvature (if compare_curvature)
+    and, if baseline has timings from the same machine, slower solvers """
+    regressions = []
+    if report["cases"] != baseline["cases"]:
+        return ["cases differ from baseline (seed or random_cases changed), nothing compared"]
+    compare_time = same_machine(report, baseline)
+    for name, result in report["solvers"].items():
+        if name not in baseline["solvers"]:
+            continue
+        base_result = baseline["solvers"][name]
+        if compare_time and has_timing(baseline, name):
+            time_ratio = result["summary"]["total_time"] / base_result["summary"]["total_time"]
+            if time_ratio > BENCHMARK_TIME_TOLERANCE:
+                regressions.append("{}: total time x{:.2f}".format(name, time_ratio))
+        if not compare_curvature:
+            continue
+        for i, (curvature, base_curvature) in enumerate(zip(result["curvature"], base_result["curvature"])):
+            if curvature - base_curvature > BENCHMARK_CURVATURE_TOLERANCE * max(abs(base_curvature), 1):
+                regressions.append("{}: case {} max curvature {:.6g} > {:.6g}".format(name, i, curvature,
+                                                                                      base_curvature))
+    return regressions
+
+
+def print_report(report: dict, baseline: dict = None):
+    """ baseline is timing baseline """
+    print("{:<12} {:>12} {:>12} {:>12} {:>10} {:>14}".format("solver", "total, s", "median, ms", "max, ms",
+                                                             "mean nfev", "mean curvature"))
+    for name, result in report["solvers"].items():
+        s = result["summary"]
+        line = "{:<12} {:>12.4f} {:>12.3f} {:>12.3f} {:>10} {:>14.6g}".format(
+            name, s["total_time"], s["median_time"] * 1e+3, s["max_time"] * 1e+3,
+            "-" if s["mean_nfev"] is None else "{:.1f}".format(s["mean_nfev"]), s["mean_curvature"])
+        if baseline is not None and name in baseline["solvers"] and has_timing(baseline, name):
+            base = baseline["solvers"][name]["summary"]
+            line += "   time x{:.2f}".format(s["total_time"] / base["total_time"])
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="connector curve optimization benchmark")
+    parser.add_argument("--solvers", nargs="*", help="subset of {} and batch".format(", ".join(single_solvers())))
+    parser.add_argument("--random-cases", type=int, default=BENCHMARK_RANDOM_CASES)
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("--repeats", type=int, default=BENCHMARK_REPEATS)
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_FILE)
+    parser.add_argument("--timing-baseline", default=BENCHMARK_TIMING_FILE)
+    parser.add_argument("--save", action="store_true", help="save nfev and curvature as new committed baseline")
+    parser.add_argument("--save-timing", action="store_true", help="save results as new local timing baseline")
+    args = parser.parse_args()
+
+    benchmark_report = run_benchmark(args.solvers, args.random_cases, args.seed, args.repeats)
+    benchmark_baseline = None
+    if not args.save and os.path.exists(args.baseline):
+        benchmark_baseline = load_baseline(args.baseline)
+    timing_baseline = None
+    if not args.save_timing and os.path.exists(args.timing_baseline):
+        timing_baseline = load_baseline(args.timing_baseline)
+        if not same_machine(benchmark_report, timing_baseline):
+            print("timing baseline is from other machine or python, timings are not compared")
+            timing_baseline = None
+    print_report(benchmark_report, timing_baseline)
+    if args.save:
+        save_baseline(quality_baseline(benchmark_report), args.baseline)
+        print("baseline saved to", args.baseline)
+    elif benchmark_baseline is not None:
+        for regression in compare(benchmark_report, benchmark_baseline):
+            print("regression:", regression)
+    if args.save_timing:
+        save_baseline(benchmark_report, args.timing_baseline)
+        print("timing baseline saved to", args.timing_baseline)
+    elif timing_baseline is not None:
+        for regression in compare(benchmark_report, timing_baseline, compare_curvature=False):
+            print("regression:", regression)
@@ -34,11 +34,25 @@ yd2 = y12 + (y23 - y12) * t
 x = xd1 + (xd2 - xd1) * t
 y = yd1 + (yd2 - yd1) * t
 
-x_dt = sympy.simplify(sympy.diff(x, t))
-y_dt = sympy.simplify(sympy.diff(y, t))
-x_dt2 = sympy.simplify(sympy.diff(x_dt, t))
-y_dt2 = sympy.simplify(sympy.diff(y_dt, t))
+CURVATURE_ARGS = (t, delta1, delta2, x0, y0, x3, y3, ang0, ang3)
 
-curv = sympy.simplify((x_dt * y_dt2 - y_dt * x_dt2) / (x_dt**2 + y_dt**2)**1.5)
 
-print(curv)
+def curvature_expression():
+    x_dt = sympy.simplify(sympy.diff(x, t))
+    y_dt = sympy.simplify(sympy.diff(y, t))
+    x_dt2 = sympy.simplify(sympy.diff(x_dt, t))
+    y_dt2 = sympy.simplify(sympy.diff(y_dt, t))
+    return sympy.simplify((x_dt * y_dt2 - y_dt * x_dt2) / (x_dt**2 + y_dt**2)**1.5)
+
+
+def curvature_expressions() -> dict[str, sympy.Expr]:
+    """ curvature and its partial derivatives by t, delta1, delta2 """
+    curv = curvature_expression()
+    return {"curvature": curv,
+            "curvature_dt": sympy.diff(curv, t),
+            "curvature_ddelta1": sympy.diff(curv, delta1),
+            "curvature_ddelta2": sympy.diff(curv, delta2)}
+
+
+if __name__ == "__main__":
+    print(curvature_expression())
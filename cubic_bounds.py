@@ -0,0 +1,61 @@
+from __future__ import annotations
+import numpy as np
+
+""" Exact axis-aligned bounding boxes of cubic bezier curves
+Extremes of each coordinate are in endpoints or in roots of its derivative in (0, 1),
+derivative of coordinate is a*t^2 + b*t + c (up to factor 3) """
+
+DERIVATIVE_PRECISION = 1e-12  # relative to control points spread, smaller leading coefficient means lower degree
+
+
+def cubic_extreme_params(control: np.ndarray) -> np.ndarray:
+    """ roots of coordinate derivatives of curves (M, 4, 2), returns (M, 2, 2) - 2 roots per coordinate,
+    nan where there is no root in (0, 1) """
+    p0, p1, p2, p3 = control[:, 0], control[:, 1], control[:, 2], control[:, 3]
+    a = -p0 + 3 * p1 - 3 * p2 + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+    scale = np.max(np.abs(control - control[:, :1]), axis=1) + 1e-300
+    quadratic = np.abs(a) > DERIVATIVE_PRECISION * scale
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_discriminant = np.sqrt(b ** 2 - 4 * a * c)
+        roots = np.stack([(-b - sqrt_discriminant) / (2 * a), (-b + sqrt_discriminant) / (2 * a)], axis=-1)
+        linear_root = -c / b
+    roots = np.where(quadratic[..., None], roots, np.stack([linear_root, np.full_like(linear_root, np.nan)], axis=-1))
+    roots[~((roots > 0) & (roots < 1))] = np.nan
+    return roots
+
+
+def cubic_bounding_boxes(control_points: np.ndarray) -> np.ndarray:
+    """ bounding boxes (M, 4) as (x min, y min, x max, y max) of curves with control points (M, 4, 2) """
+    control = np.asarray(control_points, dtype=float).reshape(-1, 4, 2)
+    t = cubic_extreme_params(control)  # (M, coordinate, root)
+    s = 1 - t
+    values = (s ** 3 * control[:, 0, :, None] + 3 * s ** 2 * t * control[:, 1, :, None] +
+              3 * s * t ** 2 * control[:, 2, :, None] + t ** 3 * control[:, 3, :, None])
+    candidates = np.concatenate([control[:, [0, 3]].transpose(0, 2, 1), values], axis=-1)
+    return np.concatenate([np.nanmin(candidates, axis=-1), np.nanmax(candidates, axis=-1)], axis=-1)
+
+
+def cubic_bounding_box(control_points: np.ndarray) -> tuple[float, float, float, float]:
+    return tuple(float(val) for val in cubic_bounding_boxes(np.asarray(control_points)[None])[0])
+
+
+if __name__ == "__main__":
+    test_1 = True
+    if test_1:
+        # boxes contain dense samples of curves and touch them
+        rng = np.random.default_rng(0)
+        control = np.concatenate([rng.uniform(0, 1000, (200, 4, 2)),
+                                  np.array([[[0, 0], [1, 0], [2, 0], [3, 0]], [[0, 0], [0, 0], [1, 1], [1, 1]]])])
+        boxes = cubic_bounding_boxes(control)
+        t = np.linspace(0, 1, 100001)[:, None]
+        for curve_control, box in zip(control, boxes):
+            points = ((1 - t) ** 3 * curve_control[0] + 3 * (1 - t) ** 2 * t * curve_control[1] +
+                      3 * (1 - t) * t ** 2 * curve_control[2] + t ** 3 * curve_control[3])
+            dense_box = np.concatenate([points.min(axis=0), points.max(axis=0)])
+            assert np.all(box[:2] <= dense_box[:2] + 1e-9) and np.all(box[2:] >= dense_box[2:] - 1e-9)
+            assert np.allclose(box, dense_box, atol=1e-6)
+        hull_area = np.prod(control.max(axis=1) - control.min(axis=1), axis=-1)
+        box_area = np.prod(boxes[:, 2:] - boxes[:, :2], axis=-1)
+        print("mean box area / control hull box area", np.mean(box_area[:200] / hull_area[:200]))
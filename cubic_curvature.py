@@ -1,18 +1,98 @@
 import math
+import multiprocessing
 import time
-from scipy.optimize import minimize
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import minimize, OptimizeResult
 import numpy as np
+from numpy.polynomial import polynomial as P
+
+from curvature_kernels import load_kernels
+from optimizer_metrics import timed, optimize_result_info
+
+
+KERNELS = load_kernels()  # bound once, cubic_curvature is called in inner loops
+_curvature_kernel = KERNELS.curvature
 
 
 def cubic_curvature(t, deltas, x0, y0, x3, y3, ang0, ang3):
     delta1, delta2 = deltas
-    return 0.666666666666667*\
-((3*delta1*t*math.sin(ang0) - 2*delta1*math.sin(ang0) - 3*delta2*t*math.sin(ang3) + delta2*math.sin(ang3) + 2*t*y0 - 2*t*y3 - y0 + y3)
-*(3*delta1*t**2*math.cos(ang0) - 4*delta1*t*math.cos(ang0) + delta1*math.cos(ang0) - 3*delta2*t**2*math.cos(ang3) + 2*delta2*t*math.cos(ang3) + 2*t**2*x0 - 2*t**2*x3 - 2*t*x0 + 2*t*x3)
-- (3*delta1*t*math.cos(ang0) - 2*delta1*math.cos(ang0) - 3*delta2*t*math.cos(ang3) + delta2*math.cos(ang3) + 2*t*x0 - 2*t*x3 - x0 + x3)
-*(3*delta1*t**2*math.sin(ang0) - 4*delta1*t*math.sin(ang0) + delta1*math.sin(ang0) - 3*delta2*t**2*math.sin(ang3) + 2*delta2*t*math.sin(ang3) + 2*t**2*y0 - 2*t**2*y3 - 2*t*y0 + 2*t*y3))\
-/((3*delta1*t**2*math.sin(ang0) - 4*delta1*t*math.sin(ang0) + delta1*math.sin(ang0) - 3*delta2*t**2*math.sin(ang3) + 2*delta2*t*math.sin(ang3) + 2*t**2*y0 - 2*t**2*y3 - 2*t*y0 + 2*t*y3)**2
-+ (3*delta1*t**2*math.cos(ang0) - 4*delta1*t*math.cos(ang0) + delta1*math.cos(ang0) - 3*delta2*t**2*math.cos(ang3) + 2*delta2*t*math.cos(ang3) + 2*t**2*x0 - 2*t**2*x3 - 2*t*x0 + 2*t*x3)**2)**1.5
+    return _curvature_kernel(t, delta1, delta2, x0, y0, x3, y3, ang0, ang3)
+
+
+def cubic_curvature_array(t, delta1, delta2, x0, y0, x3, y3, ang0, ang3) -> np.ndarray:
+    """ signed curvature of cubic bezier, same as cubic_curvature, but all arguments
+    may be numpy arrays and are broadcast against each other """
+    t = np.asarray(t, dtype=float)
+    cos0, sin0 = np.cos(ang0), np.sin(ang0)
+    cos3, sin3 = np.cos(ang3), np.sin(ang3)
+    # control polygon legs P1-P0, P2-P1, P3-P2
+    dx1, dy1 = delta1 * cos0, delta1 * sin0
+    dx3, dy3 = -delta2 * cos3, -delta2 * sin3
+    dx2 = x3 - x0 - dx1 - dx3
+    dy2 = y3 - y0 - dy1 - dy3
+    s = 1 - t
+    x_dt = 3 * (s * s * dx1 + 2 * s * t * dx2 + t * t * dx3)
+    y_dt = 3 * (s * s * dy1 + 2 * s * t * dy2 + t * t * dy3)
+    x_dt2 = 6 * (s * (dx2 - dx1) + t * (dx3 - dx2))
+    y_dt2 = 6 * (s * (dy2 - dy1) + t * (dy3 - dy2))
+    return (x_dt * y_dt2 - y_dt * x_dt2) / (x_dt * x_dt + y_dt * y_dt) ** 1.5
+
+
+T_GRID = np.linspace(0, 1, 101)
+ROOT_IMAG_PRECISION = 1e-7
+LEADING_COEFFICIENT_PRECISION = 1e-7  # relative to max coefficient, smaller leading coefficient means lower degree
+
+# hand-picked connector geometry (x0, y0, x3, y3, ang0, ang3) for tests and benchmark, last one is straight
+HAND_PICKED_CASES = [(0, 0, 1e+3, 1e+3, math.atan(0.5), -0.5 * math.pi - math.atan(0.5)),
+                     (0, 0, 1, 1, math.atan(0.5), -0.5 * math.pi + math.atan(0.5)),
+                     (0, 0, 1, 1, math.atan(0.5), 0),
+                     (0, 0, 1, 1, math.atan(0.5), math.pi),
+                     (0, 0, 1, 1, math.atan(0.5), math.pi + math.atan(0.5)),
+                     (0, 0, 1, 1, -math.atan(0.5), math.pi - math.atan(0.5)),
+                     (0, 0, 2, 10, -math.pi / 2, math.pi / 2),
+                     (0, 0, 1, 1, math.atan(0.5), -0.5 * math.pi),
+                     (0, 0, 1, 0, 0, math.pi)]
+
+
+def cubic_curvature_polynomials(deltas, x0, y0, x3, y3, ang0, ang3) -> tuple[np.ndarray, np.ndarray]:
+    """ returns coefficients (lowest degree first) of polynomials n(t) and d(t)
+    such that curvature = n(t) / (3 * d(t) ** 1.5) """
+    delta1, delta2 = deltas
+    dx1, dy1 = delta1 * math.cos(ang0), delta1 * math.sin(ang0)
+    dx3, dy3 = -delta2 * math.cos(ang3), -delta2 * math.sin(ang3)
+    dx2 = x3 - x0 - dx1 - dx3
+    dy2 = y3 - y0 - dy1 - dy3
+    # first derivative / 3 = a0 + a1*t + a2*t**2
+    ax0, ay0 = dx1, dy1
+    ax1, ay1 = 2 * (dx2 - dx1), 2 * (dy2 - dy1)
+    ax2, ay2 = dx1 - 2 * dx2 + dx3, dy1 - 2 * dy2 + dy3
+    n = np.array([ax0 * ay1 - ay0 * ax1,
+                  2 * (ax0 * ay2 - ay0 * ax2),
+                  ax1 * ay2 - ay1 * ax2])
+    d = P.polyadd(P.polymul([ax0, ax1, ax2], [ax0, ax1, ax2]), P.polymul([ay0, ay1, ay2], [ay0, ay1, ay2]))
+    return n, d
+
+
+def exact_max_curvature(deltas, x0, y0, x3, y3, ang0, ang3) -> tuple[float, float]:
+    """ max of signed curvature on t in [0, 1] and its t
+    candidates are endpoints and real roots of 2*n'*d - 3*n*d' (companion matrix eigenvalues) """
+    n, d = cubic_curvature_polynomials(deltas, x0, y0, x3, y3, ang0, ang3)
+    derivative_numerator = P.polysub(2 * P.polymul(P.polyder(n), d), 3 * P.polymul(n, P.polyder(d)))
+    roots = P.polyroots(P.polytrim(derivative_numerator)) if np.any(derivative_numerator) else np.empty(0)
+    roots = roots[np.abs(roots.imag) < ROOT_IMAG_PRECISION].real
+    candidates = np.concatenate(([0., 1.], roots[(roots > 0) & (roots < 1)]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = P.polyval(candidates, n) / (3 * P.polyval(candidates, d) ** 1.5)
+    if np.all(np.isnan(values)):
+        # derivative vanishes at all candidates (coincident endpoints, degenerate angles), curvature is sampled
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = cubic_curvature_array(T_GRID, deltas[0], deltas[1], x0, y0, x3, y3, ang0, ang3)
+        if np.all(np.isnan(values)):
+            return math.inf, 0.
+        candidates = T_GRID
+    i_max = np.nanargmax(values)
+    return float(values[i_max]), float(candidates[i_max])
+
 
 def inversed_curvature(*args):
     return -cubic_curvature(*args)
@@ -23,10 +103,10 @@ def inversed_curvature(*args):
 
 def max_curvature(*args):
     # print("args = ", args)
-    start_time = time.time()
-    res = minimize(inversed_curvature, 0.5, args=args, method="Powell", bounds=[(0, 1)])
+    deltas, geometry = args[0], args[1:]
+    t_start = T_GRID[np.argmax(cubic_curvature_array(T_GRID, deltas[0], deltas[1], *geometry))]
+    res = minimize(inversed_curvature, t_start, args=args, method="Powell", bounds=[(0, 1)])
     return -res.fun, res.x
-    # print("eval time = ", time.time()-start_time)
     # print("res = ", res)
 
 # print(inversed_curvature(0.5, 0, 0, 1e+3, 1e+3,
@@ -40,17 +120,302 @@ def max_curvature(*args):
 #                       math.atan(0.5), -0.5*math.pi-math.atan(0.5),
 #                       706.719, 706.719))
 def intermediate_max_curvature(*args):
-    return max_curvature(*args)[0]
+    return exact_max_curvature(*args)[0]
+
+def max_curvature_gradient(deltas, x0, y0, x3, y3, ang0, ang3) -> tuple[float, np.ndarray]:
+    """ max curvature and its gradient by (delta1, delta2)
+    by envelope theorem gradient is partial derivative of curvature at fixed argmax t """
+    value, t_max = exact_max_curvature(deltas, x0, y0, x3, y3, ang0, ang3)
+    args = (t_max, deltas[0], deltas[1], x0, y0, x3, y3, ang0, ang3)
+    return value, np.array([KERNELS.curvature_ddelta1(*args), KERNELS.curvature_ddelta2(*args)], dtype=float)
+
+
+GRADIENT_METHODS = ("L-BFGS-B", "SLSQP")  # SLSQP may stop at a few percent worse optimum than Nelder-Mead
+GRADIENT_FTOL = 1e-6  # for curvature in units of 1/chord length
+WARM_START_XATOL = 1e-4  # in units of chord length
+MAX_RELATIVE_XATOL = 1e-1  # in units of chord length
+
+
+def normalized_max_curvature_gradient(normalized_deltas, dist, *args) -> tuple[float, np.ndarray]:
+    """ same as max_curvature_gradient in units of chord length, so tolerances do not depend on scale """
+    value, gradient = max_curvature_gradient(normalized_deltas * dist, *args)
+    return value * dist, gradient * dist ** 2
+
 
-def deltas_optimization(*args):
+@timed("deltas_optimization", optimize_result_info)
+def deltas_optimization(*args, method: str = "Nelder-Mead", start_deltas=None, start_step: float = None,
+                        time_budget: float = None, xatol: float = None):
+    """ method is Nelder-Mead or one of GRADIENT_METHODS, which use max_curvature_gradient
+    start_deltas is initial guess instead of 0.3 of chord length (warm start from previous solution),
+    start_step is size of Nelder-Mead initial simplex in units of chord length, it also switches
+    tolerance to WARM_START_XATOL of chord length
+    time_budget in seconds stops optimization after iteration exceeding it with best deltas evaluated
+    (last iterate of SLSQP may be worse than start point), then result has deadline_exceeded = True
+    xatol is Nelder-Mead tolerance of deltas in scene units (visible accuracy), capped by MAX_RELATIVE_XATOL
+    of chord length, curvature tolerance is then not checked """
     dist = ((args[0]-args[2])**2 + (args[1]-args[3])**2)**0.5
-    # start_time = time.time()
-    res = minimize(intermediate_max_curvature, x0=np.array([3e-1*dist, 3e-1*dist]), args=args, method="Nelder-Mead",
+    if dist == 0:
+        # coincident endpoints, curve degenerates to point for any angles
+        return OptimizeResult(x=np.zeros(2), fun=0., nfev=0, nit=0, success=True, message="Coincident endpoints",
+                              deadline_exceeded=False, source="optimization")
+    if start_deltas is None:
+        x0 = np.array([3e-1*dist, 3e-1*dist])
+    else:
+        x0 = np.maximum(np.asarray(start_deltas, dtype=float), 1e-2*dist)
+    deadline_exceeded = False
+    deadline_callback = None
+    if time_budget is not None:
+        deadline = time.perf_counter() + time_budget
+
+        def stop_after_deadline(xk):
+            nonlocal deadline_exceeded
+            if time.perf_counter() > deadline:
+                deadline_exceeded = True
+                raise StopIteration
+        deadline_callback = stop_after_deadline
+    best_fun, best_x = np.inf, None
+
+    def tracked(objective):
+        """ objective remembering best evaluated deltas """
+        def wrapper(x, *objective_args):
+            nonlocal best_fun, best_x
+            value = objective(x, *objective_args)
+            fun = value[0] if isinstance(value, tuple) else value
+            if fun < best_fun:
+                best_fun, best_x = fun, np.array(x, dtype=float)
+            return value
+        return wrapper
+
+    if method in GRADIENT_METHODS:
+        res = minimize(tracked(normalized_max_curvature_gradient), x0=x0 / dist, args=(dist, *args),
+                       method=method, jac=True, bounds=[(1e-2, np.inf), (1e-2, np.inf)],
+                       options={"ftol": GRADIENT_FTOL}, callback=deadline_callback)
+        if deadline_exceeded and best_fun < res.fun:
+            res.x = best_x
+            res.fun, res.jac = normalized_max_curvature_gradient(best_x, dist, *args)
+        res.x = res.x * dist
+        res.fun = res.fun / dist
+        res.jac = res.jac / dist ** 2
+        res.deadline_exceeded = deadline_exceeded
+        res.source = "optimization"
+        return res
+    options = {}
+    if start_step is not None:
+        options["initial_simplex"] = x0 + start_step * dist * np.array([[0, 0], [1, 0], [0, 1]])
+        options["xatol"] = WARM_START_XATOL * dist
+    if xatol is not None:
+        options["xatol"] = min(xatol, MAX_RELATIVE_XATOL * dist)
+        options["fatol"] = np.inf
+    res = minimize(tracked(intermediate_max_curvature), x0=x0, args=args, method=method,
                    bounds=[(1e-2*dist, np.inf), (1e-2*dist, np.inf)],
-                        options={'xtol': 1e-1*dist, "ftol": np.inf})  #
-    # print("eval time = ", time.time()-start_time)
+                        options=options, callback=deadline_callback)  #
+    if deadline_exceeded and best_fun < res.fun:
+        res.x, res.fun = best_x, best_fun
+    res.deadline_exceeded = deadline_exceeded
+    res.source = "optimization"
     return res
 # np.array([3e-1*dist, 3e-1*dist])
 
 # print(deltas_optimization(0, 0, 1e+3, 1e+3,
 #                           math.atan(0.5), -0.5 * math.pi - math.atan(0.5)))
+
+
+
+def batch_polymul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """ product of polynomials given row-wise, coefficients lowest degree first """
+    result = np.zeros(a.shape[:-1] + (a.shape[-1] + b.shape[-1] - 1,))
+    for i in range(a.shape[-1]):
+        result[..., i:i + b.shape[-1]] += a[..., i:i + 1] * b
+    return result
+
+
+def batch_polyval(x: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """ x of shape (N, M), c of shape (N, K) """
+    result = np.zeros_like(x)
+    for i in range(c.shape[-1] - 1, -1, -1):
+        result = result * x + c[:, i:i + 1]
+    return result
+
+
+def batch_max_curvature(deltas: np.ndarray, geometry: np.ndarray) -> np.ndarray:
+    """ exact_max_curvature for deltas (N, 2) and geometry rows (x0, y0, x3, y3, ang0, ang3) (N, 6)
+    roots of all derivative numerators are eigenvalues of stacked companion matrices """
+    x0, y0, x3, y3, ang0, ang3 = geometry.T
+    dx1, dy1 = deltas[:, 0] * np.cos(ang0), deltas[:, 0] * np.sin(ang0)
+    dx3, dy3 = -deltas[:, 1] * np.cos(ang3), -deltas[:, 1] * np.sin(ang3)
+    dx2 = x3 - x0 - dx1 - dx3
+    dy2 = y3 - y0 - dy1 - dy3
+    ax = np.stack([dx1, 2 * (dx2 - dx1), dx1 - 2 * dx2 + dx3], axis=-1)
+    ay = np.stack([dy1, 2 * (dy2 - dy1), dy1 - 2 * dy2 + dy3], axis=-1)
+    n = np.stack([ax[:, 0] * ay[:, 1] - ay[:, 0] * ax[:, 1],
+                  2 * (ax[:, 0] * ay[:, 2] - ay[:, 0] * ax[:, 2]),
+                  ax[:, 1] * ay[:, 2] - ay[:, 1] * ax[:, 2]], axis=-1)
+    d = batch_polymul(ax, ax) + batch_polymul(ay, ay)
+    n_dt = n[:, 1:] * np.arange(1, 3)
+    d_dt = d[:, 1:] * np.arange(1, 5)
+    derivative_numerator = 2 * batch_polymul(n_dt, d) - 3 * batch_polymul(n, d_dt)
+
+    count = len(deltas)
+    leading = derivative_numerator[:, -1]
+    regular = np.abs(leading) > LEADING_COEFFICIENT_PRECISION * np.max(np.abs(derivative_numerator), axis=-1)
+    companion = np.zeros((count, 5, 5))
+    companion[:, np.arange(1, 5), np.arange(4)] = 1
+    companion[regular, :, -1] = -derivative_numerator[regular, :-1] / leading[regular, None]
+    roots = np.linalg.eigvals(companion)
+    real_roots = (np.abs(roots.imag) < ROOT_IMAG_PRECISION) & (roots.real > 0) & (roots.real < 1) & regular[:, None]
+    candidates = np.concatenate([np.zeros((count, 1)), np.ones((count, 1)), np.where(real_roots, roots.real, 0)],
+                                axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = batch_polyval(candidates, n) / (3 * batch_polyval(candidates, d) ** 1.5)
+    values[np.isnan(values)] = -np.inf
+    result = np.max(values, axis=-1)
+    for i in np.flatnonzero(~regular):
+        result[i] = exact_max_curvature(deltas[i], *geometry[i])[0]
+    return result
+
+
+BATCH_XATOL = 1e-6  # in units of chord length
+BATCH_FATOL = 1e-4  # in units of 1/chord length
+BATCH_MAXITER = 400  # same as scipy defaults for 2 variables
+BATCH_MAXFEV = 400
+
+
+def batch_deltas_optimization(geometry: np.ndarray) -> np.ndarray:
+    """ deltas_optimization for geometry rows (x0, y0, x3, y3, ang0, ang3) (N, 6), returns deltas (N, 2)
+    Nelder-Mead simplexes of all rows advance in lockstep in units of chord length,
+    converged rows and rows out of evaluations are masked out of later steps """
+    geometry = np.asarray(geometry, dtype=float).reshape(-1, 6)
+    count = len(geometry)
+    dist = np.hypot(geometry[:, 0] - geometry[:, 2], geometry[:, 1] - geometry[:, 3])
+    lower_bound = 1e-2
+
+    nfev = np.zeros(count, dtype=int)
+
+    def objective(rows: np.ndarray, normalized_deltas: np.ndarray) -> np.ndarray:
+        nfev[rows] += 1
+        return batch_max_curvature(normalized_deltas * dist[rows, None], geometry[rows]) * dist[rows]
+
+    # same initial simplex as scipy: start point and 5% steps along each axis
+    simplex = np.empty((count, 3, 2))
+    simplex[:] = [[3e-1, 3e-1], [3.15e-1, 3e-1], [3e-1, 3.15e-1]]
+    all_rows = np.arange(count)
+    values = np.stack([objective(all_rows, simplex[:, i]) for i in range(3)], axis=-1)
+
+    active = all_rows
+    for _ in range(BATCH_MAXITER):
+        order = np.argsort(values[active], axis=-1)
+        simplex[active] = np.take_along_axis(simplex[active], order[..., None], axis=1)
+        values[active] = np.take_along_axis(values[active], order, axis=1)
+        size = np.max(np.abs(simplex[active, 1:] - simplex[active, :1]), axis=(1, 2))
+        spread = np.max(np.abs(values[active, 1:] - values[active, :1]), axis=-1)
+        active = active[((size > BATCH_XATOL) | (spread > BATCH_FATOL)) & (nfev[active] < BATCH_MAXFEV)]
+        if not len(active):
+            break
+        sim, val = simplex[active], values[active]
+        centroid = sim[:, :2].mean(axis=1)
+        reflected = np.maximum(2 * centroid - sim[:, 2], lower_bound)
+        f_reflected = objective(active, reflected)
+        new_point, f_new = reflected.copy(), f_reflected.copy()
+
+        expand = f_reflected < val[:, 0]
+        if np.any(expand):
+            expanded = np.maximum(3 * centroid[expand] - 2 * sim[expand, 2], lower_bound)
+            f_expanded = objective(active[expand], expanded)
+            better = f_expanded < f_reflected[expand]
+            new_point[np.flatnonzero(expand)[better]] = expanded[better]
+            f_new[np.flatnonzero(expand)[better]] = f_expanded[better]
+
+        contract = f_reflected >= val[:, 1]
+        shrink = np.zeros(len(active), dtype=bool)
+        if np.any(contract):
+            outside = f_reflected[contract] < val[contract, 2]
+            contracted = np.where(outside[:, None],
+                                  np.maximum(1.5 * centroid[contract] - 0.5 * sim[contract, 2], lower_bound),
+                                  0.5 * (centroid[contract] + sim[contract, 2]))
+            f_contracted = objective(active[contract], contracted)
+            accepted = np.where(outside, f_contracted <= f_reflected[contract], f_contracted < val[contract, 2])
+            new_point[contract] = contracted
+            f_new[contract] = f_contracted
+            shrink[np.flatnonzero(contract)[~accepted]] = True
+
+        replace = active[~shrink]
+        simplex[replace, 2] = new_point[~shrink]
+        values[replace, 2] = f_new[~shrink]
+        if np.any(shrink):
+            shrunk = active[shrink]
+            simplex[shrunk, 1:] = simplex[shrunk, :1] + 0.5 * (simplex[shrunk, 1:] - simplex[shrunk, :1])
+            for i in (1, 2):
+                values[shrunk, i] = objective(shrunk, simplex[shrunk, i])
+
+    best = np.argmin(values, axis=-1)
+    return simplex[all_rows, best] * dist[:, None]
+
+
+PARALLEL_CHUNK_SIZE = 256
+PARALLEL_START_METHOD = "spawn"  # fork of process with running Qt and solver threads may deadlock
+
+
+def parallel_deltas_optimization(geometry: np.ndarray, max_workers: int = None,
+                                 chunk_size: int = PARALLEL_CHUNK_SIZE) -> np.ndarray:
+    """ batch_deltas_optimization of chunks in process pool, scipy and numpy loops hold GIL, so threads do not help
+    geometry (N, 6), returns deltas (N, 2) """
+    geometry = np.asarray(geometry, dtype=float).reshape(-1, 6)
+    if len(geometry) <= chunk_size:
+        return batch_deltas_optimization(geometry)
+    chunks = np.array_split(geometry, math.ceil(len(geometry) / chunk_size))
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context(PARALLEL_START_METHOD)) as executor:
+        return np.concatenate(list(executor.map(batch_deltas_optimization, chunks)))
+
+if __name__ == "__main__":
+    test_cases = HAND_PICKED_CASES[:-1]
+
+    test_1 = True
+    if test_1:
+        # L-BFGS-B reaches Nelder-Mead optimum within relative 1e-3, SLSQP may stop in worse point
+        # (1.7% in case 0), so it is checked within 2e-2 only, evaluations are reported per method
+        fun_tolerances = {"L-BFGS-B": 1e-3, "SLSQP": 2e-2}
+        for method in GRADIENT_METHODS:
+            nm_nfev, grad_nfev = 0, 0
+            for i, case in enumerate(test_cases):
+                nm_res = deltas_optimization(*case)
+                grad_res = deltas_optimization(*case, method=method)
+                print(method, "case", i, "nfev", nm_res.nfev, grad_res.nfev, "fun", nm_res.fun, grad_res.fun)
+                assert grad_res.fun <= nm_res.fun + fun_tolerances[method] * abs(nm_res.fun)
+                nm_nfev += nm_res.nfev
+                grad_nfev += grad_res.nfev
+            print(method, "total nfev", nm_nfev, grad_nfev, "ratio {:.2f}".format(grad_nfev / nm_nfev))
+            # straight connector: curvature is zero for any deltas, relative comparison of zeros is meaningless,
+            # gradient methods stop at start point
+            straight_case = HAND_PICKED_CASES[-1]
+            grad_res = deltas_optimization(*straight_case, method=method)
+            print(method, "straight", "nfev", grad_res.nfev, "fun", grad_res.fun)
+            assert abs(grad_res.fun) < 1e-12 and abs(deltas_optimization(*straight_case).fun) < 1e-12
+
+    test_2 = True
+    if test_2:
+        # batch optimization gives the same deltas as one by one
+        batch_deltas = batch_deltas_optimization(np.array(test_cases))
+        for case, batch_delta in zip(test_cases, batch_deltas):
+            single_delta = deltas_optimization(*case).x
+            print("deltas", single_delta, batch_delta)
+            assert exact_max_curvature(batch_delta, *case)[0] <= exact_max_curvature(single_delta, *case)[0] * (1 + 1e-3)
+
+    test_3 = True
+    if test_3:
+        # coincident endpoints give point curve, curvature of vanishing derivative is not nan
+        res = deltas_optimization(5, 5, 5, 5, 0.3, 2.)
+        assert res.success and np.all(res.x == 0)
+        assert exact_max_curvature((0., 0.), 5, 5, 5, 5, 0.3, 2.) == (math.inf, 0.)
+
+    test_4 = True
+    if test_4:
+        # result stopped by deadline is never worse than start point
+        for method in ("Nelder-Mead",) + GRADIENT_METHODS:
+            for case in test_cases:
+                dist = math.hypot(case[2] - case[0], case[3] - case[1])
+                start_curvature = exact_max_curvature((3e-1 * dist, 3e-1 * dist), *case)[0]
+                res = deltas_optimization(*case, method=method, time_budget=1e-6)
+                print(method, "deadline", res.deadline_exceeded, "fun", start_curvature, res.fun)
+                assert res.deadline_exceeded and res.fun <= start_curvature
+                assert abs(exact_max_curvature(res.x, *case)[0] - res.fun) <= 1e-9 * max(abs(res.fun), 1)
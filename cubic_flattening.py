@@ -0,0 +1,95 @@
+from __future__ import annotations
+import numpy as np
+
+""" Adaptive flattening of cubic bezier curves into polylines
+Segment is replaced by its chord when 3/4 * max(|p0 - 2p1 + p2|, |p1 - 2p2 + p3|) <= tolerance, which bounds
+distance between segment and chord (Wang's formula for one segment), otherwise it is split in half.
+All segments of all curves of batch are checked and split together level by level """
+
+FLATTENING_MAX_DEPTH = 16  # at most 2**16 segments per curve
+
+
+def flatness(control: np.ndarray) -> np.ndarray:
+    """ upper bound of distance from segments (K, 4, 2) to their chords """
+    second_differences = control[:, :2] - 2 * control[:, 1:3] + control[:, 2:]
+    return 0.75 * np.max(np.hypot(second_differences[..., 0], second_differences[..., 1]), axis=-1)
+
+
+def split_half(control: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ de Casteljau split of segments (K, 4, 2) at t = 0.5 """
+    p01 = 0.5 * (control[:, 0] + control[:, 1])
+    p12 = 0.5 * (control[:, 1] + control[:, 2])
+    p23 = 0.5 * (control[:, 2] + control[:, 3])
+    p012 = 0.5 * (p01 + p12)
+    p123 = 0.5 * (p12 + p23)
+    middle = 0.5 * (p012 + p123)
+    left = np.stack([control[:, 0], p01, p012, middle], axis=1)
+    right = np.stack([middle, p123, p23, control[:, 3]], axis=1)
+    return left, right
+
+
+def flatten_cubics(control_points: np.ndarray, tolerance: float,
+                   max_depth: int = FLATTENING_MAX_DEPTH) -> tuple[np.ndarray, np.ndarray]:
+    """ polylines of curves with control points (M, 4, 2) within tolerance,
+    returns points (K, 2) and offsets (M + 1,): points of curve i are points[offsets[i]:offsets[i + 1]] """
+    control = np.asarray(control_points, dtype=float).reshape(-1, 4, 2)
+    curves_count = len(control)
+    segments = control
+    curve_index = np.arange(curves_count)
+    t_start = np.zeros(curves_count)
+    done_index, done_t, done_ends = [], [], []
+    size = 1.
+    for depth in range(max_depth + 1):
+        flat = flatness(segments) <= tolerance if depth < max_depth else np.ones(len(segments), dtype=bool)
+        done_index.append(curve_index[flat])
+        done_t.append(t_start[flat])
+        done_ends.append(segments[flat, 3])
+        if np.all(flat):
+            break
+        left, right = split_half(segments[~flat])
+        size /= 2
+        segments = np.concatenate([left, right])
+        curve_index = np.tile(curve_index[~flat], 2)
+        t_start = np.concatenate([t_start[~flat], t_start[~flat] + size])
+    done_index, done_t, done_ends = np.concatenate(done_index), np.concatenate(done_t), np.concatenate(done_ends)
+    order = np.lexsort((done_t, done_index))
+    segments_count = np.bincount(done_index, minlength=curves_count)
+    offsets = np.zeros(curves_count + 1, dtype=int)
+    offsets[1:] = np.cumsum(segments_count + 1)
+    points = np.empty((offsets[-1], 2))
+    points[offsets[:-1]] = control[:, 0]
+    is_start = np.zeros(offsets[-1], dtype=bool)
+    is_start[offsets[:-1]] = True
+    points[~is_start] = done_ends[order]
+    return points, offsets
+
+
+def flatten_cubic(control_points: np.ndarray, tolerance: float, max_depth: int = FLATTENING_MAX_DEPTH) -> np.ndarray:
+    """ polyline (N, 2) of one curve with control points (4, 2) """
+    return flatten_cubics(np.asarray(control_points)[None], tolerance, max_depth)[0]
+
+
+def split_polylines(points: np.ndarray, offsets: np.ndarray) -> list[np.ndarray]:
+    return np.split(points, offsets[1:-1])
+
+
+if __name__ == "__main__":
+    test_1 = True
+    if test_1:
+        # polyline is within tolerance of curve and has fewer points for looser tolerance
+        import bezier
+        control = np.array([[[0, 0], [300, 0], [0, 300], [300, 300]],
+                            [[0, 0], [1000, 1000], [0, 1000], [10, 0]],
+                            [[0, 0], [1, 0], [2, 0], [3, 0]]], dtype=float)
+        for tolerance in [1., 1e-1, 1e-2]:
+            points, offsets = flatten_cubics(control, tolerance)
+            for curve_control, polyline in zip(control, split_polylines(points, offsets)):
+                curve_points = bezier.Curve.from_nodes(curve_control.T).evaluate_multi(np.linspace(0, 1, 2001)).T
+                segment = polyline[1:] - polyline[:-1]
+                relative = curve_points[:, None] - polyline[None, :-1]
+                length2 = np.maximum(np.sum(segment ** 2, axis=-1), 1e-300)
+                u = np.clip(np.sum(relative * segment, axis=-1) / length2, 0, 1)
+                distance = np.min(np.linalg.norm(relative - u[..., None] * segment, axis=-1), axis=-1)
+                print("tolerance", tolerance, "points", len(polyline), "max distance", np.max(distance))
+                assert np.max(distance) <= tolerance
+                assert np.allclose(polyline[[0, -1]], curve_control[[0, 3]])
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import hashlib
+import importlib.util
+import os
+import warnings
+from types import ModuleType
+
+""" Build step for curvature kernels
+Sympy expressions from cubic_bezier_evaluations are printed with common subexpression elimination
+into a plain python module curvature_kernels_generated.py, which is committed with hash of the derivation source.
+Import never runs sympy, outdated module is only reported, python curvature_kernels.py rebuilds it """
+
+GENERATED_KERNELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "curvature_kernels_generated.py")
+DERIVATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cubic_bezier_evaluations.py")
+GENERATOR_VERSION = "2"
+
+_kernels: ModuleType = None
+
+
+class KernelsNotBuiltException(Exception):
+    pass
+
+
+def source_hash(path: str, salt: str = "") -> str:
+    """ hash of source independent of line endings and trailing whitespace """
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    source = b"\n".join(line.rstrip() for line in lines)
+    return hashlib.sha1(source + salt.encode()).hexdigest()[:16]
+
+
+def derivation_hash() -> str:
+    return source_hash(DERIVATION_FILE, GENERATOR_VERSION)
+
+
+def generate_kernels_source() -> str:
+    """ kernels use math functions of angles, so they are fast for scalar arguments,
+    t and deltas may be numpy arrays """
+    import sympy
+    from sympy.printing.pycode import PythonCodePrinter
+    from cubic_bezier_evaluations import CURVATURE_ARGS, curvature_expressions
+
+    printer = PythonCodePrinter()
+    arg_names = ", ".join(str(arg) for arg in CURVATURE_ARGS)
+    lines = ['""" generated by curvature_kernels.py from cubic_bezier_evaluations.py, do not edit """',
+             "import math", "", 'DERIVATION_HASH = "{}"'.format(derivation_hash()), ""]
+    for name, expr in curvature_expressions().items():
+        replacements, (reduced,) = sympy.cse(expr, symbols=sympy.numbered_symbols("cse_"))
+        lines.append("")
+        lines.append("def {}({}):".format(name, arg_names))
+        for symbol, sub_expr in replacements:
+            lines.append("    {} = {}".format(symbol, printer.doprint(sub_expr)))
+        lines.append("    return {}".format(printer.doprint(reduced)))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_kernels() -> str:
+    """ writes generated module, returns its path """
+    tmp_path = GENERATED_KERNELS_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(generate_kernels_source())
+    os.replace(tmp_path, GENERATED_KERNELS_FILE)
+    return GENERATED_KERNELS_FILE
+
+
+def import_generated_kernels() -> ModuleType:
+    spec = importlib.util.spec_from_file_location("curvature_kernels_generated", GENERATED_KERNELS_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_kernels() -> ModuleType:
+    """ module with functions curvature, curvature_dt, curvature_ddelta1, curvature_ddelta2
+    of (t, delta1, delta2, x0, y0, x3, y3, ang0, ang3)
+    committed module is used as is, module generated from other derivation is only warned about """
+    global _kernels
+    if _kernels is None:
+        if not os.path.exists(GENERATED_KERNELS_FILE):
+            raise KernelsNotBuiltException("{} is missing, run python curvature_kernels.py".format(
+                GENERATED_KERNELS_FILE))
+        module = import_generated_kernels()
+        if getattr(module, "DERIVATION_HASH", None) != derivation_hash():
+            warnings.warn("{} is generated from other derivation, run python curvature_kernels.py".format(
+                GENERATED_KERNELS_FILE))
+        _kernels = module
+    return _kernels
+
+
+if __name__ == "__main__":
+    print(build_kernels())
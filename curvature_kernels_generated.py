@@ -0,0 +1,116 @@
+""" generated by curvature_kernels.py from cubic_bezier_evaluations.py, do not edit """
+import math
+
+DERIVATION_HASH = "da1d7f390b755eeb"
+
+
+def curvature(t, delta1, delta2, x0, y0, x3, y3, ang0, ang3):
+    cse_0 = delta1*math.sin(ang0)
+    cse_1 = 2*t
+    cse_2 = cse_1*y0
+    cse_3 = cse_1*y3
+    cse_4 = t**2
+    cse_5 = 2*cse_4
+    cse_6 = 4*t
+    cse_7 = delta2*math.sin(ang3)
+    cse_8 = 3*cse_4
+    cse_9 = -cse_0*cse_6 + cse_0*cse_8 + cse_0 + cse_1*cse_7 - cse_2 + cse_3 + cse_5*y0 - cse_5*y3 - cse_7*cse_8
+    cse_10 = delta1*math.cos(ang0)
+    cse_11 = cse_1*x0
+    cse_12 = cse_1*x3
+    cse_13 = delta2*math.cos(ang3)
+    cse_14 = cse_1*cse_13 - cse_10*cse_6 + cse_10*cse_8 + cse_10 - cse_11 + cse_12 - cse_13*cse_8 + cse_5*x0 - cse_5*x3
+    cse_15 = 3*t
+    return 0.666666666666667*(cse_14**2 + cse_9**2)**(-1.5)*(cse_14*(cse_0*cse_15 - 2*cse_0 - cse_15*cse_7 + cse_2 - cse_3 + cse_7 - y0 + y3) - cse_9*(cse_10*cse_15 - 2*cse_10 + cse_11 - cse_12 - cse_13*cse_15 + cse_13 - x0 + x3))
+
+
+def curvature_dt(t, delta1, delta2, x0, y0, x3, y3, ang0, ang3):
+    cse_0 = delta1*math.sin(ang0)
+    cse_1 = 2*y0
+    cse_2 = cse_1*t
+    cse_3 = 2*y3
+    cse_4 = cse_3*t
+    cse_5 = t**2
+    cse_6 = 4*cse_0
+    cse_7 = delta2*math.sin(ang3)
+    cse_8 = 2*cse_7
+    cse_9 = 3*cse_0
+    cse_10 = 3*cse_7
+    cse_11 = cse_0 + cse_1*cse_5 - cse_10*cse_5 - cse_2 - cse_3*cse_5 + cse_4 + cse_5*cse_9 - cse_6*t + cse_8*t
+    cse_12 = delta1*math.cos(ang0)
+    cse_13 = 2*x0
+    cse_14 = cse_13*t
+    cse_15 = 2*x3
+    cse_16 = cse_15*t
+    cse_17 = 4*cse_12
+    cse_18 = delta2*math.cos(ang3)
+    cse_19 = 2*cse_18
+    cse_20 = 3*cse_12
+    cse_21 = 3*cse_18
+    cse_22 = cse_12 + cse_13*cse_5 - cse_14 - cse_15*cse_5 + cse_16 - cse_17*t + cse_19*t + cse_20*cse_5 - cse_21*cse_5
+    cse_23 = cse_11**2 + cse_22**2
+    cse_24 = -2*cse_0 - cse_10*t + cse_2 - cse_4 + cse_7 + cse_9*t - y0 + y3
+    cse_25 = 4*x0
+    cse_26 = 4*x3
+    cse_27 = 6*t
+    cse_28 = -2*cse_12 + cse_14 - cse_16 + cse_18 + cse_20*t - cse_21*t - x0 + x3
+    cse_29 = 4*y0
+    cse_30 = 4*y3
+    cse_31 = 8*t
+    cse_32 = 12*t
+    return 0.666666666666667*cse_23**(-2.5)*(-cse_11*cse_28 + cse_22*cse_24)*(-1.5*cse_11*(cse_0*cse_32 - 8*cse_0 - cse_29 + cse_30 + cse_31*y0 - cse_31*y3 - cse_32*cse_7 + 4*cse_7) - 1.5*cse_22*(cse_12*cse_32 - 8*cse_12 - cse_18*cse_32 + 4*cse_18 - cse_25 + cse_26 + cse_31*x0 - cse_31*x3)) + 0.666666666666667*cse_23**(-1.5)*(-cse_11*(cse_13 - cse_15 + cse_20 - cse_21) + cse_22*(cse_1 - cse_10 - cse_3 + cse_9) + cse_24*(cse_12*cse_27 - cse_13 + cse_15 - cse_17 - cse_18*cse_27 + cse_19 + cse_25*t - cse_26*t) - cse_28*(cse_0*cse_27 - cse_1 - cse_27*cse_7 + cse_29*t + cse_3 - cse_30*t - cse_6 + cse_8))
+
+
+def curvature_ddelta1(t, delta1, delta2, x0, y0, x3, y3, ang0, ang3):
+    cse_0 = math.sin(ang0)
+    cse_1 = cse_0*delta1
+    cse_2 = 2*t
+    cse_3 = cse_2*y0
+    cse_4 = cse_2*y3
+    cse_5 = t**2
+    cse_6 = 2*cse_5
+    cse_7 = 4*t
+    cse_8 = delta2*math.sin(ang3)
+    cse_9 = 3*cse_5
+    cse_10 = -cse_1*cse_7 + cse_1*cse_9 + cse_1 + cse_2*cse_8 - cse_3 + cse_4 + cse_6*y0 - cse_6*y3 - cse_8*cse_9
+    cse_11 = math.cos(ang0)
+    cse_12 = cse_11*delta1
+    cse_13 = cse_2*x0
+    cse_14 = cse_2*x3
+    cse_15 = delta2*math.cos(ang3)
+    cse_16 = -cse_12*cse_7 + cse_12*cse_9 + cse_12 - cse_13 + cse_14 + cse_15*cse_2 - cse_15*cse_9 + cse_6*x0 - cse_6*x3
+    cse_17 = cse_10**2 + cse_16**2
+    cse_18 = 3*t
+    cse_19 = cse_1*cse_18 - 2*cse_1 - cse_18*cse_8 + cse_3 - cse_4 + cse_8 - y0 + y3
+    cse_20 = cse_12*cse_18 - 2*cse_12 + cse_13 - cse_14 - cse_15*cse_18 + cse_15 - x0 + x3
+    cse_21 = 2*cse_0
+    cse_22 = 2*cse_11
+    cse_23 = 8*t
+    cse_24 = 6*cse_5
+    return 0.666666666666667*cse_17**(-2.5)*(-cse_10*cse_20 + cse_16*cse_19)*(-1.5*cse_10*(-cse_0*cse_23 + cse_0*cse_24 + cse_21) - 1.5*cse_16*(-cse_11*cse_23 + cse_11*cse_24 + cse_22)) + 0.666666666666667*cse_17**(-1.5)*(-cse_10*(cse_11*cse_18 - cse_22) + cse_16*(cse_0*cse_18 - cse_21) + cse_19*(-cse_11*cse_7 + cse_11*cse_9 + cse_11) - cse_20*(-cse_0*cse_7 + cse_0*cse_9 + cse_0))
+
+
+def curvature_ddelta2(t, delta1, delta2, x0, y0, x3, y3, ang0, ang3):
+    cse_0 = delta1*math.sin(ang0)
+    cse_1 = 2*t
+    cse_2 = cse_1*y0
+    cse_3 = cse_1*y3
+    cse_4 = t**2
+    cse_5 = 2*cse_4
+    cse_6 = 4*t
+    cse_7 = math.sin(ang3)
+    cse_8 = cse_7*delta2
+    cse_9 = 3*cse_4
+    cse_10 = -cse_0*cse_6 + cse_0*cse_9 + cse_0 + cse_1*cse_8 - cse_2 + cse_3 + cse_5*y0 - cse_5*y3 - cse_8*cse_9
+    cse_11 = delta1*math.cos(ang0)
+    cse_12 = cse_1*x0
+    cse_13 = cse_1*x3
+    cse_14 = math.cos(ang3)
+    cse_15 = cse_14*delta2
+    cse_16 = cse_1*cse_15 - cse_11*cse_6 + cse_11*cse_9 + cse_11 - cse_12 + cse_13 - cse_15*cse_9 + cse_5*x0 - cse_5*x3
+    cse_17 = cse_10**2 + cse_16**2
+    cse_18 = 3*t
+    cse_19 = cse_0*cse_18 - 2*cse_0 - cse_18*cse_8 + cse_2 - cse_3 + cse_8 - y0 + y3
+    cse_20 = cse_11*cse_18 - 2*cse_11 + cse_12 - cse_13 - cse_15*cse_18 + cse_15 - x0 + x3
+    cse_21 = 6*cse_4
+    return 0.666666666666667*cse_17**(-2.5)*(-cse_10*cse_20 + cse_16*cse_19)*(-1.5*cse_10*(-cse_21*cse_7 + 4*cse_7*t) - 1.5*cse_16*(-cse_14*cse_21 + 4*cse_14*t)) + 0.666666666666667*cse_17**(-1.5)*(-cse_10*(-cse_14*cse_18 + cse_14) + cse_16*(-cse_18*cse_7 + cse_7) + cse_19*(-cse_14*cse_9 + 2*cse_14*t) - cse_20*(-cse_7*cse_9 + 2*cse_7*t))
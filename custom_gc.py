@@ -4,17 +4,24 @@ from numbers import Real
 from collections import defaultdict
 from typing import Optional
 import math
+import traceback
 from dataclasses import dataclass
 
+import numpy as np
+
 from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView, QMainWindow, QGraphicsPathItem, QGraphicsRectItem, \
     QGraphicsEllipseItem, QGraphicsItem, QGraphicsPolygonItem, QGraphicsSceneMouseEvent, QGraphicsTextItem, QWidget, \
     QStyleOptionGraphicsItem, QStyle, QGraphicsItemGroup, QGraphicsSceneWheelEvent
 from PyQt5.QtGui import QPen, QBrush, QPolygonF, QPainterPath, QFont, QFontMetrics, QPainterPathStroker, QTransform, \
-    QRegion, QPainter, QWheelEvent, QResizeEvent, QMouseEvent
-from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF
-
-from sympy import Point2D
-from graphic_numpy import Angle, angle_rad_difference, UniversalConnectionCurve
+    QRegion, QPainter, QWheelEvent, QResizeEvent, QMouseEvent, QCloseEvent
+from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF, QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from graphic_numpy import Angle, angle_rad_difference, UniversalConnectionCurve, FloatPoint2D
+from deltas_store import open_deltas_store, close_deltas_store
+from deltas_cache import bulk_cached_deltas_optimization
+from cubic_flattening import flatten_cubics, split_polylines
+from cubic_bounds import cubic_bounding_boxes
+from optimizer_metrics import OPTIMIZER_METRICS, enable_metrics
 from custom_enum import CustomEnum
 
 POINTS_SIZE = 10  # 10
@@ -27,6 +34,13 @@ THORN_LABEL_FONT = QFont(THORN_LABEL_FONT_FAMILY, THORN_LABEL_FONT_SIZE)
 
 H_CLICK_BEZIER = 6  # 6
 ZOOM_COEFFICIENT = 1.1  # 1.1
+CONNECTOR_TIME_BUDGET = 2e-3  # in seconds, connector optimization per mouse move event
+DELTAS_STORE_FILE = None  # sqlite file for optimal deltas between sessions, e.g. "scene.deltas.sqlite"
+CONNECTOR_SHAPE_WIDTH = 40  # width of clickable area around connector
+SQUARE_CAP_REACH = math.sqrt(2) / 2  # square cap of stroke reaches this times width beyond diagonal end of curve
+CONNECTOR_SHAPE_MARGIN = CONNECTOR_SHAPE_WIDTH * SQUARE_CAP_REACH  # bounds of curve to bounds of clickable area
+CONNECTOR_PIXEL_TOLERANCE = 0.25  # control points accuracy in screen pixels, solver tolerance follows zoom
+METRICS_FILE = None  # JSON file, where optimizer metrics are dumped on close, e.g. "optimizer_metrics.json"
 
 
 def bounded_scale_function(scale: Real, base_scale: Real = 1) -> float:
@@ -225,6 +239,7 @@ class HedgehogGraphicsPathItem(QGraphicsPathItem):
         super().mouseReleaseEvent(e)
         if e.button() == Qt.LeftButton:
             self.start_pos = None
+            self.base_hp.refine_connectors()
 
     def mouseMoveEvent(self, e: QGraphicsSceneMouseEvent):
         if e.buttons() == Qt.LeftButton:
@@ -267,6 +282,10 @@ class HedgehogPoint:
             else:
                 cnct.end_cond = ConnectCondition(*new_coords)
 
+    def refine_connectors(self):
+        for cnct, _ in self.connectors:
+            cnct.refine()
+
     @property
     def path_item(self):
         return self._path_item
@@ -371,14 +390,26 @@ class ConnectCondition:
 
 
 class ShapedQGraphicsPathItem(QGraphicsPathItem):
+    _curve_rect: Optional[QRectF] = None
 
     def setPath(self, path: QPainterPath) -> None:
         super().setPath(path)
         ps = QPainterPathStroker()
-        ps.setWidth(40)
+        ps.setWidth(CONNECTOR_SHAPE_WIDTH)
         self._outshape = ps.createStroke(path)
         # self.setFlag(QGraphicsItem.ItemIgnoresTransformations)
 
+    def set_curve_rect(self, rect: QRectF):
+        """ exact bounds of curve, instead of control points hull of path """
+        self.prepareGeometryChange()
+        self._curve_rect = rect
+
+    def boundingRect(self) -> QRectF:
+        if self._curve_rect is None:
+            return super().boundingRect()
+        margin = max(CONNECTOR_SHAPE_MARGIN, self.pen().widthF() * SQUARE_CAP_REACH)
+        return self._curve_rect.adjusted(-margin, -margin, margin, margin)
+
     def shape(self) -> QPainterPath:
         return self._outshape
 
@@ -388,13 +419,69 @@ class ShapedQGraphicsPathItem(QGraphicsPathItem):
         super().paint(painter, my_option, widget)
 
 
+class ConnectorSolveJob(QRunnable):
+    def __init__(self, solver: ConnectorSolver, connector: Connector, job_id: int, geometry: tuple,
+                 tolerance: float):
+        super().__init__()
+        # job is owned and deleted by pool, superseded job is dropped by job_id, so no reference is kept
+        self.solver = solver
+        self.connector = connector
+        self.job_id = job_id
+        self.geometry = geometry
+        self.tolerance = tolerance
+
+    def run(self):
+        if self.connector.job_id != self.job_id:
+            return
+        try:
+            res = self.connector.conn_curve.solve(self.geometry, time_budget=None, tolerance=self.tolerance)
+        except Exception:
+            # failure is reported as None result, so connector is not left solving
+            traceback.print_exc()
+            res = None
+        if self.connector.job_id == self.job_id:
+            self.solver.solved.emit(self.connector, self.job_id, self.geometry, res)
+
+
+class ConnectorSolver(QObject):
+    """ solves connector curves in thread pool, results are applied in GUI thread by queued signal """
+    solved = pyqtSignal(object, int, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.solved.connect(self.apply_solution)
+
+    def submit(self, connector: Connector, job_id: int, geometry: tuple, tolerance: float):
+        self.pool.start(ConnectorSolveJob(self, connector, job_id, geometry, tolerance))
+
+    def shutdown(self):
+        """ drops queued jobs and waits for running ones, before deltas store is closed """
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    @pyqtSlot(object, int, object, object)
+    def apply_solution(self, connector: Connector, job_id: int, geometry: tuple, res):
+        connector.apply_solution(job_id, geometry, res)
+
+
 class Connector:
-    def __init__(self, start_cond: ConnectCondition, end_cond: ConnectCondition):
+    def __init__(self, start_cond: ConnectCondition, end_cond: ConnectCondition, solver: ConnectorSolver = None,
+                 deltas: tuple[float, float] = None, scale_level: float = 1):
+        """ with solver curve updates are optimized in background, provisional curve is shown meanwhile
+        deltas are optimal deltas from bulk optimization for first curve
+        scale_level is view zoom, which defines solver tolerance """
+        self.solver = solver
+        self._initial_deltas = deltas
+        self.scale_level = scale_level
+        self.job_id = 0  # id of last submitted job, results of other jobs are stale
+        self.solving = False
         self._start_cond = start_cond
         self._end_cond = end_cond
         self._path_item = ShapedQGraphicsPathItem()
         self._path_item.setZValue(-10)
         self._base_path = QPainterPath()
+        self.conn_curve: Optional[UniversalConnectionCurve] = None
         self.evaluate_path()
         self.set_view_properties()
 
@@ -420,13 +507,76 @@ class Connector:
         self._end_cond = val
         self.evaluate_path()
 
+    @staticmethod
+    def curve_geometry(start_cond: ConnectCondition, end_cond: ConnectCondition) -> tuple:
+        """ x0, y0, x3, y3, ang0, ang3 as in UniversalConnectionCurve.geometry """
+        return (float(start_cond.x), float(start_cond.y), float(end_cond.x), float(end_cond.y),
+                Angle(-math.radians(start_cond.angle)).angle_0_2pi, Angle(-math.radians(end_cond.angle)).angle_0_2pi)
+
     def evaluate_path(self):
-        self._base_path.clear()
-        point_start = Point2D(self.start_cond.x, self.start_cond.y)
+        point_start = FloatPoint2D(self.start_cond.x, self.start_cond.y)
         angle_start = Angle(-math.radians(self.start_cond.angle))
-        point_end = Point2D(self.end_cond.x, self.end_cond.y)
+        point_end = FloatPoint2D(self.end_cond.x, self.end_cond.y)
         angle_end = Angle(-math.radians(self.end_cond.angle))
-        conn_curve = UniversalConnectionCurve(point_start, point_end, angle_start, angle_end)
+        if self.conn_curve is None:
+            # first solve is complete, later ones are interactive and bounded
+            self.conn_curve = UniversalConnectionCurve(point_start, point_end, angle_start, angle_end,
+                                                       deltas=self._initial_deltas, tolerance=self.tolerance)
+            self.evaluate_curve_path()
+            self.conn_curve.time_budget = CONNECTOR_TIME_BUDGET
+            return
+        elif self.solver is None:
+            self.conn_curve.update(point_start, point_end, angle_start, angle_end)
+        else:
+            self.conn_curve.update(point_start, point_end, angle_start, angle_end, optimize=False)
+            self.submit_solve()
+        self.evaluate_curve_path()
+
+    def submit_solve(self):
+        """ previous job is superseded: it returns without solve if not started yet, its result is dropped """
+        self.job_id += 1
+        self.solving = True
+        self.solver.submit(self, self.job_id, self.conn_curve.geometry(), self.conn_curve.tolerance)
+
+    def apply_solution(self, job_id: int, geometry: tuple, res):
+        if job_id != self.job_id:
+            return
+        self.solving = False
+        if res is None:
+            # solve failed, provisional curve is kept, it is not converged, so it is refined on release
+            return
+        if geometry != self.conn_curve.geometry():
+            # curve was changed in GUI thread without new job, result is for old geometry
+            self.submit_solve()
+            return
+        self.conn_curve.apply_solution(geometry, res)
+        self.evaluate_curve_path()
+
+    def refine(self):
+        """ completes optimization interrupted by time budget """
+        if not self.conn_curve.converged and not self.solving:
+            self.conn_curve.refine()
+            self.evaluate_curve_path()
+
+    @property
+    def tolerance(self) -> float:
+        return CONNECTOR_PIXEL_TOLERANCE / self.scale_level
+
+    def set_scale_level(self, scale_level: float):
+        """ zoomed in curve solved with coarse tolerance is solved again, in background if there is solver """
+        self.scale_level = scale_level
+        self.conn_curve.tolerance = self.tolerance
+        if not self.conn_curve.needs_refinement() or self.solving:
+            return
+        if self.solver is None:
+            self.conn_curve.refine()
+            self.evaluate_curve_path()
+        else:
+            self.submit_solve()
+
+    def evaluate_curve_path(self):
+        self._base_path.clear()
+        conn_curve = self.conn_curve
         control_point_1 = conn_curve.start_dir_point
         control_point_2 = conn_curve.end_dir_point
         self._base_path.moveTo(self.start_cond.x, self.start_cond.y)
@@ -434,6 +584,12 @@ class Connector:
                                 QPointF(control_point_2.x, control_point_2.y),
                                 QPointF(self.end_cond.x, self.end_cond.y))
         self.path_item.setPath(self._base_path)
+        self.path_item.set_curve_rect(self.bounding_rect())
+
+    def bounding_rect(self) -> QRectF:
+        """ exact bounds of curve by roots of derivative """
+        x_min, y_min, x_max, y_max = self.conn_curve.bounding_box()
+        return QRectF(x_min, y_min, x_max - x_min, y_max - y_min)
 
     def set_view_properties(self, scale_factor: float = 1):
         pen = QPen(Qt.black)
@@ -444,22 +600,36 @@ class Connector:
     def path(self):
         return self._base_path
 
+    def polyline(self, pixel_tolerance: float = CONNECTOR_PIXEL_TOLERANCE) -> np.ndarray:
+        """ curve as polyline (N, 2) in scene coordinates within pixel tolerance at current zoom """
+        return self.conn_curve.flatten(pixel_tolerance / self.scale_level)
+
     def scaled_redraw(self, scale_factor: float):
         scale_factor = 1
         self.set_view_properties(scale_factor)
 
 
 class CustomGC(QGraphicsScene):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, deltas_store_path: str = None, **kwargs):
         super().__init__(*args, **kwargs)
         # self.setSceneRect(0, 0, 4, 4)
         self.setBackgroundBrush(QBrush(Qt.white))
+        self.deltas_store = open_deltas_store(deltas_store_path) if deltas_store_path else None
+        self.connector_solver = ConnectorSolver()
+        self.scale_level = 1
         self.hps = []
         self.connects = []
         hp_1 = self.add_hp(200, 200, [45, 135, 270])
         self.hp_1 = hp_1
         hp_2 = self.add_hp(300, 500, [0, 90, 180])
-        cnct_12_22 = self.add_connector(hp_1, 2, hp_2, 2)
+        cnct_12_22, = self.add_connectors([(hp_1, 2, hp_2, 2)])
+        if self.deltas_store:
+            self.deltas_store.flush()
+
+    def close_deltas_store(self):
+        if self.deltas_store:
+            close_deltas_store()
+            self.deltas_store = None
 
     def add_hp(self, x, y, angles) -> HedgehogPoint:
         hp = HedgehogPoint(x, y, angles)
@@ -468,21 +638,54 @@ class CustomGC(QGraphicsScene):
         return hp
 
     def add_connector(self, hp1: HedgehogPoint, num_point_1: int,
-                      hp2: HedgehogPoint, num_point_2: int) -> Connector:
+                      hp2: HedgehogPoint, num_point_2: int, deltas: tuple[float, float] = None) -> Connector:
         cc1 = ConnectCondition(*hp1.thorn_ends[num_point_1], hp1.angles[num_point_1])
         cc2 = ConnectCondition(*hp2.thorn_ends[num_point_2], hp2.angles[num_point_2])
-        cnct = Connector(cc1, cc2)
+        cnct = Connector(cc1, cc2, self.connector_solver, deltas, self.scale_level)
         hp1.connectors.append((cnct, "start"))
         hp2.connectors.append((cnct, "end"))
         self.addItem(cnct.path_item)
         self.connects.append(cnct)
         return cnct
 
+    def connector_polylines(self, pixel_tolerance: float = CONNECTOR_PIXEL_TOLERANCE) -> list[np.ndarray]:
+        """ polylines of all connectors flattened together, for hit-testing, export and length """
+        if not self.connects:
+            return []
+        control_points = np.array([cnct.conn_curve.control_points() for cnct in self.connects])
+        return split_polylines(*flatten_cubics(control_points, pixel_tolerance / self.scale_level))
+
+    def connector_bounding_boxes(self) -> np.ndarray:
+        """ exact bounds (N, 4) as (x min, y min, x max, y max) of all connectors, evaluated together """
+        if not self.connects:
+            return np.empty((0, 4))
+        return cubic_bounding_boxes(np.array([cnct.conn_curve.control_points() for cnct in self.connects]))
+
+    def connectors_in_rect(self, rect: QRectF) -> list[Connector]:
+        """ connectors which bounds intersect rect, for viewport culling """
+        boxes = self.connector_bounding_boxes()
+        intersects = ((boxes[:, 0] <= rect.right()) & (boxes[:, 2] >= rect.left()) &
+                      (boxes[:, 1] <= rect.bottom()) & (boxes[:, 3] >= rect.top()))
+        return [cnct for cnct, inside in zip(self.connects, intersects) if inside]
+
+    def add_connectors(self, connections: list[tuple[HedgehogPoint, int, HedgehogPoint, int]],
+                       max_workers: int = None) -> list[Connector]:
+        """ bulk scene load: curves of all connections are optimized together in process pool """
+        geometry = np.array([Connector.curve_geometry(
+            ConnectCondition(*hp1.thorn_ends[num_point_1], hp1.angles[num_point_1]),
+            ConnectCondition(*hp2.thorn_ends[num_point_2], hp2.angles[num_point_2]))
+            for hp1, num_point_1, hp2, num_point_2 in connections]).reshape(-1, 6)
+        deltas = bulk_cached_deltas_optimization(geometry, max_workers=max_workers)
+        return [self.add_connector(*connection, deltas=tuple(connection_deltas))
+                for connection, connection_deltas in zip(connections, deltas)]
+
     def const_geom_obj_redraw(self, scale_factor: float):
+        self.scale_level = scale_factor
         for hp in self.hps:
             hp.scaled_redraw(scale_factor)
         for cnct in self.connects:
             cnct.scaled_redraw(scale_factor)
+            cnct.set_scale_level(scale_factor)
 
 
 class CustomView(QGraphicsView):
@@ -550,7 +753,9 @@ class CustomMW(QMainWindow):
         super().__init__(*args, **kwargs)
         self.setGeometry(40, 40, 1840, 980)
 
-        self.scene = CustomGC()  # 0, 0, 1800, 900  -2000, -2000, 4000, 4000
+        if METRICS_FILE:
+            enable_metrics()
+        self.scene = CustomGC(deltas_store_path=DELTAS_STORE_FILE)  # 0, 0, 1800, 900  -2000, -2000, 4000, 4000
         self.view = CustomView(self.scene)
         self.view.setSceneRect(0, 0, 1, 1)
         self.view.window_resized(self.width(), self.height())
@@ -564,5 +769,49 @@ class CustomMW(QMainWindow):
         super().resizeEvent(a0)
         self.view.window_resized(self.width(), self.height())
 
+    def closeEvent(self, a0: QCloseEvent) -> None:
+        self.scene.connector_solver.shutdown()
+        self.scene.close_deltas_store()
+        if METRICS_FILE:
+            OPTIMIZER_METRICS.dump(METRICS_FILE)
+        super().closeEvent(a0)
+
     # def wheelEvent(self, a0: QWheelEvent) -> None:
     #     pass
+
+
+if __name__ == "__main__":
+    import sys
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+
+    test_1 = True
+    if test_1:
+        # many moves in a row supersede running jobs, only result of last one is applied
+        scene = CustomGC()
+        cnct = scene.connects[0]
+        for _ in range(20):
+            scene.hp_1.moved(0, 0, 3, 1)
+        scene.connector_solver.pool.waitForDone()
+        app.processEvents()
+        assert not cnct.solving and cnct.job_id == 20
+        assert cnct.conn_curve.geometry() == Connector.curve_geometry(cnct.start_cond, cnct.end_cond)
+        scene.connector_solver.shutdown()
+
+    test_2 = True
+    if test_2:
+        # failed solve does not leave connector solving, next move is solved again
+        scene = CustomGC()
+        cnct = scene.connects[0]
+        solve = cnct.conn_curve.solve
+        cnct.conn_curve.solve = lambda *args, **kwargs: 1 / 0
+        scene.hp_1.moved(0, 0, 3, 1)
+        scene.connector_solver.pool.waitForDone()
+        app.processEvents()
+        assert not cnct.solving and not cnct.conn_curve.converged
+        cnct.conn_curve.solve = solve
+        scene.hp_1.moved(0, 0, 3, 1)
+        scene.connector_solver.pool.waitForDone()
+        app.processEvents()
+        assert not cnct.solving and cnct.conn_curve.converged
+        scene.connector_solver.shutdown()
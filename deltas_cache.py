@@ -0,0 +1,180 @@
+from __future__ import annotations
+import math
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+import deltas_store
+from cubic_curvature import deltas_optimization, parallel_deltas_optimization, WARM_START_XATOL, \
+    MAX_RELATIVE_XATOL
+from deltas_table import canonical_angles, batch_table_deltas
+
+""" Process-wide LRU cache of optimal deltas
+Key is canonical geometry: end angles relative to chord, quantized, value is deltas in units of chord length
+and tolerance they were solved with in units of chord length (0 is full precision),
+so one entry serves all translated, rotated and scaled copies of connector, which need no finer tolerance """
+
+DELTAS_CACHE_SIZE = 4096
+DELTAS_CACHE_ANGLE_QUANTUM = 1e-4  # in radians
+
+
+class DeltasCache:
+    def __init__(self, max_size: int = DELTAS_CACHE_SIZE, angle_quantum: float = DELTAS_CACHE_ANGLE_QUANTUM):
+        self._max_size = max_size
+        self.angle_quantum = angle_quantum
+        self._items: OrderedDict[tuple[int, int], tuple[float, float, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # cache is shared with connector solver threads
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, val: int):
+        self._max_size = val
+        self.evict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def key(self, rel_ang0: float, rel_ang3: float) -> tuple[int, int]:
+        periods = round(2 * math.pi / self.angle_quantum)
+        return round(rel_ang0 / self.angle_quantum) % periods, round(rel_ang3 / self.angle_quantum) % periods
+
+    def get(self, key: tuple[int, int], tolerance: float = 0.) -> Optional[tuple[float, float, float]]:
+        """ (delta1, delta2, tolerance) solved with tolerance not coarser than given one """
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[2] > tolerance:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple[int, int], normalized_deltas: tuple[float, float], tolerance: float = 0.):
+        """ entry solved with finer tolerance is kept """
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or tolerance <= entry[2]:
+                self._items[key] = (normalized_deltas[0], normalized_deltas[1], tolerance)
+            self._items.move_to_end(key)
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.
+
+    def stats(self) -> dict:
+        return {"size": len(self), "max_size": self.max_size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hit_rate}
+
+
+DELTAS_CACHE = DeltasCache()
+
+
+def cached_deltas_optimization(x0, y0, x3, y3, ang0, ang3, cache: DeltasCache = None,
+                               **optimization_kwargs) -> OptimizeResult:
+    """ deltas_optimization through cache and persistent store if it is opened,
+    deltas from cache are rescaled to actual chord length
+    optimization_kwargs are passed to deltas_optimization on miss, results are cached with tolerance
+    they were solved with (xatol) and are returned only for requests with the same or coarser xatol,
+    result has tolerance in scene units, None is full precision
+    only converged results are cached, warm start (start_step) is cached with tolerance WARM_START_XATOL,
+    so drag positions visited again are served from cache, but its optimum, which may depend on drag path,
+    never replaces full precision entry of cold solve and is not returned for full precision request """
+    if cache is None:
+        cache = DELTAS_CACHE
+    dist, rel_ang0, rel_ang3 = canonical_angles(x0, y0, x3, y3, ang0, ang3)
+    tolerance = relative_tolerance(optimization_kwargs.get("xatol"), dist)
+    if optimization_kwargs.get("start_step") is not None:
+        tolerance = max(tolerance, WARM_START_XATOL)
+    key = cache.key(rel_ang0, rel_ang3)
+    entry = cache.get(key, tolerance)
+    if entry is not None:
+        return OptimizeResult(x=np.array(entry[:2]) * dist, nfev=0, success=True, message="From deltas cache",
+                              source="cache", tolerance=scene_tolerance(entry[2], dist))
+    store = deltas_store.DELTAS_STORE
+    if store is not None:
+        entry = store.get(key, tolerance)
+        if entry is not None:
+            cache.put(key, entry[:2], entry[2])
+            return OptimizeResult(x=np.array(entry[:2]) * dist, nfev=0, success=True,
+                                  message="From deltas store", source="store", tolerance=scene_tolerance(entry[2], dist))
+    res = deltas_optimization(x0, y0, x3, y3, ang0, ang3, **optimization_kwargs)
+    res.tolerance = scene_tolerance(tolerance, dist)
+    if dist > 0 and res.success and not res.deadline_exceeded:
+        normalized_deltas = (float(res.x[0] / dist), float(res.x[1] / dist))
+        cache.put(key, normalized_deltas, tolerance)
+        if store is not None:
+            store.put(key, normalized_deltas, tolerance)
+    return res
+
+
+def relative_tolerance(xatol: Optional[float], dist: float) -> float:
+    """ xatol in units of chord length as deltas_optimization caps it, 0 is full precision,
+    xatol finer than WARM_START_XATOL of chord length is full precision too,
+    deltas of coincident endpoints are exact (zero) """
+    if xatol is None or dist == 0:
+        return 0.
+    tolerance = min(xatol / dist, MAX_RELATIVE_XATOL)
+    return 0. if tolerance <= WARM_START_XATOL else tolerance
+
+
+def scene_tolerance(tolerance: float, dist: float) -> Optional[float]:
+    """ tolerance in units of chord length to scene units, None is full precision as in relative_tolerance """
+    return tolerance * dist if tolerance > WARM_START_XATOL else None
+
+
+def bulk_cached_deltas_optimization(geometry: np.ndarray, cache: DeltasCache = None,
+                                    max_workers: int = None) -> np.ndarray:
+    """ optimal deltas (N, 2) for geometry rows (x0, y0, x3, y3, ang0, ang3) (N, 6)
+    rows are taken from table, cache and store, the rest are solved by parallel_deltas_optimization
+    and written back to cache and store """
+    if cache is None:
+        cache = DELTAS_CACHE
+    geometry = np.asarray(geometry, dtype=float).reshape(-1, 6)
+    deltas = batch_table_deltas(geometry)
+    store = deltas_store.DELTAS_STORE
+    unsolved, unsolved_keys = [], []
+    for i in np.flatnonzero(np.isnan(deltas[:, 0])):
+        dist, rel_ang0, rel_ang3 = canonical_angles(*geometry[i])
+        key = cache.key(rel_ang0, rel_ang3)
+        entry = cache.get(key)
+        if entry is None and store is not None:
+            entry = store.get(key)
+        if entry is None:
+            unsolved.append(i)
+            unsolved_keys.append(key)
+        else:
+            deltas[i] = np.array(entry[:2]) * dist
+    if unsolved:
+        deltas[unsolved] = parallel_deltas_optimization(geometry[unsolved], max_workers=max_workers)
+        dist = np.hypot(geometry[unsolved, 2] - geometry[unsolved, 0], geometry[unsolved, 3] - geometry[unsolved, 1])
+        for key, key_dist, key_deltas in zip(unsolved_keys, dist, deltas[unsolved]):
+            if key_dist == 0:
+                continue
+            normalized_deltas = (float(key_deltas[0] / key_dist), float(key_deltas[1] / key_dist))
+            cache.put(key, normalized_deltas)
+            if store is not None:
+                store.put(key, normalized_deltas)
+        if store is not None:
+            store.flush()
+    return deltas
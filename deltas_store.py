@@ -0,0 +1,118 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from curvature_kernels import derivation_hash, source_hash
+
+""" Persistent store of optimal deltas between sessions
+sqlite file next to scene, key is quantized canonical geometry (as in DeltasCache) and solver version,
+so results of changed solver are never reused, deltas are stored with tolerance as in DeltasCache """
+
+SOLVER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cubic_curvature.py")
+DELTAS_STORE_BATCH_SIZE = 256
+
+
+def solver_version() -> str:
+    return source_hash(SOLVER_FILE, derivation_hash())
+
+
+class DeltasStore:
+    def __init__(self, path: str, batch_size: int = DELTAS_STORE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.version = solver_version()
+        self._pending: dict[tuple[int, int], tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS solved_deltas (version TEXT, key0 INTEGER, "
+                                 "key1 INTEGER, delta1 REAL, delta2 REAL, tolerance REAL, "
+                                 "PRIMARY KEY (version, key0, key1))")
+        self._connection.commit()
+
+    def get(self, key: tuple[int, int], tolerance: float = 0.) -> Optional[tuple[float, float, float]]:
+        """ (delta1, delta2, tolerance) solved with tolerance not coarser than given one """
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._connection.execute("SELECT delta1, delta2, tolerance FROM solved_deltas "
+                                                 "WHERE version = ? AND key0 = ? AND key1 = ?",
+                                                 (self.version, *key)).fetchone()
+        return entry if entry is not None and entry[2] <= tolerance else None
+
+    def put(self, key: tuple[int, int], normalized_deltas: tuple[float, float], tolerance: float = 0.):
+        """ write is postponed until batch_size results are collected or flush, entry with finer tolerance is kept """
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None or tolerance <= entry[2]:
+                self._pending[key] = (normalized_deltas[0], normalized_deltas[1], tolerance)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            self._connection.executemany("INSERT INTO solved_deltas VALUES (?, ?, ?, ?, ?, ?) "
+                                         "ON CONFLICT (version, key0, key1) DO UPDATE SET delta1 = excluded.delta1, "
+                                         "delta2 = excluded.delta2, tolerance = excluded.tolerance "
+                                         "WHERE excluded.tolerance <= solved_deltas.tolerance",
+                                         [(self.version, *key, *entry) for key, entry in self._pending.items()])
+            self._connection.commit()
+            self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+
+DELTAS_STORE: Optional[DeltasStore] = None
+
+
+def open_deltas_store(path: str) -> DeltasStore:
+    """ opens process-wide store, which cached_deltas_optimization consults on cache miss """
+    global DELTAS_STORE
+    close_deltas_store()
+    DELTAS_STORE = DeltasStore(path)
+    return DELTAS_STORE
+
+
+def close_deltas_store():
+    global DELTAS_STORE
+    if DELTAS_STORE is not None:
+        DELTAS_STORE.close()
+        DELTAS_STORE = None
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_1 = True
+    if test_1:
+        # entries round-trip through sqlite file with finer tolerance kept, other solver version does not see them
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "test.deltas.sqlite")
+            store = DeltasStore(path)
+            store.put((1, 2), (0.3, 0.4), 1e-3)
+            assert store.get((1, 2), 1e-3) == (0.3, 0.4, 1e-3) and store.get((1, 2)) is None
+            store.put((1, 2), (0.31, 0.41), 0.)
+            store.put((1, 2), (0.5, 0.5), 1e-2)
+            store.close()
+
+            store = DeltasStore(path)
+            assert store.get((1, 2)) == (0.31, 0.41, 0.) and store.get((3, 4), 1.) is None
+            store.put((1, 2), (0.5, 0.5), 1e-2)
+            store.flush()
+            assert store.get((1, 2), 1e-2) == (0.31, 0.41, 0.)
+            store.close()
+
+            solver_file, version = SOLVER_FILE, solver_version()
+            SOLVER_FILE = os.path.join(tmp_dir, "changed_solver.py")
+            with open(SOLVER_FILE, "w") as f:
+                f.write("changed solver\n")
+            store = DeltasStore(path)
+            assert store.version != version and store.get((1, 2), 1.) is None
+            store.close()
+            SOLVER_FILE = solver_file
@@ -0,0 +1,121 @@
+from __future__ import annotations
+import math
+import os
+from typing import Optional
+
+import numpy as np
+
+""" Precomputed optimal deltas in canonical form
+Optimal deltas depend only on end angles relative to the chord and scale with chord length,
+so table is built over (relative start angle, relative end angle) for unit chord from (0, 0) to (1, 0).
+Table layer 0 and 1 - normalized deltas in grid nodes, layer 2 - verified error of bilinear interpolation
+in each cell (max excess of curvature over optimal, relative to max(|optimal curvature|, 1) in chord units),
+inf for cells where interpolation is not trusted """
+
+DELTAS_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "deltas_table.npy")
+DELTAS_TABLE_SIZE = 72  # nodes per angle, grid step 5 degrees
+DELTAS_TABLE_MAX_DELTA = 10  # in units of chord length, larger optimum means optimization diverged
+DELTAS_TABLE_ERROR_BOUND = 1e-2
+DELTAS_TABLE_MAX_SPREAD = 2e-1  # in units of chord length, larger spread in cell corners means optimum jumps
+
+_table: np.ndarray = None
+
+
+def canonical_angles(x0, y0, x3, y3, ang0, ang3) -> tuple[float, float, float]:
+    """ returns chord length and end angles relative to chord in [0, 2pi) """
+    chord_angle = math.atan2(y3 - y0, x3 - x0)
+    return math.hypot(x3 - x0, y3 - y0), (ang0 - chord_angle) % (2 * math.pi), (ang3 - chord_angle) % (2 * math.pi)
+
+
+def build_table(size: int = DELTAS_TABLE_SIZE) -> np.ndarray:
+    from cubic_curvature import batch_deltas_optimization, batch_max_curvature
+
+    # optimum on twice finer grid: even nodes are table, odd nodes verify interpolation
+    fine_size = 2 * size
+    fine_angles = np.arange(fine_size) * 2 * math.pi / fine_size
+    ang0, ang3 = np.meshgrid(fine_angles, fine_angles, indexing="ij")
+    count = fine_size * fine_size
+    geometry = np.column_stack([np.zeros(count), np.zeros(count), np.ones(count), np.zeros(count),
+                                ang0.ravel(), ang3.ravel()])
+    optimal = batch_deltas_optimization(geometry)
+    optimal[np.max(optimal, axis=-1) > DELTAS_TABLE_MAX_DELTA] = np.nan
+    optimal = optimal.reshape(fine_size, fine_size, 2)
+
+    table = np.empty((3, size, size))
+    table[:2] = np.moveaxis(optimal[::2, ::2], -1, 0)
+    interpolated = interpolate(table[:2], ang0.ravel(), ang3.ravel(), size)[0]
+    valid = np.all(np.isfinite(interpolated), axis=-1) & np.all(np.isfinite(optimal.reshape(-1, 2)), axis=-1)
+    optimal_curvature = np.full(count, np.nan)
+    interpolated_curvature = np.full(count, np.nan)
+    optimal_curvature[valid] = batch_max_curvature(optimal.reshape(-1, 2)[valid], geometry[valid])
+    interpolated_curvature[valid] = batch_max_curvature(interpolated[valid], geometry[valid])
+    fine_error = ((interpolated_curvature - optimal_curvature) /
+                  np.maximum(np.abs(optimal_curvature), 1)).reshape(fine_size, fine_size)
+    fine_error[np.isnan(fine_error)] = np.inf
+
+    # cell (i, j) covers fine nodes 2i..2i+2, 2j..2j+2 with wrap over 2pi
+    fine_index = (2 * np.arange(size)[:, None] + np.arange(3)) % fine_size
+    cell_error = fine_error[fine_index[:, None, :, None], fine_index[None, :, None, :]]
+    table[2] = np.max(cell_error, axis=(2, 3))
+
+    # optimum may jump between local minima inside cell, which verification nodes could miss
+    corners = np.stack([np.roll(table[:2], shift, axis=(1, 2)) for shift in [(0, 0), (-1, 0), (0, -1), (-1, -1)]])
+    corner_spread = np.max(np.max(corners, axis=0) - np.min(corners, axis=0), axis=0)
+    table[2, ~(corner_spread <= DELTAS_TABLE_MAX_SPREAD)] = np.inf
+    return table
+
+
+def interpolate(table_deltas: np.ndarray, rel_ang0, rel_ang3, size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ periodic bilinear interpolation, returns normalized deltas (N, 2) and cell indices """
+    u = np.asarray(rel_ang0, dtype=float) * size / (2 * math.pi)
+    v = np.asarray(rel_ang3, dtype=float) * size / (2 * math.pi)
+    i, j = np.floor(u).astype(int) % size, np.floor(v).astype(int) % size
+    fu, fv = u - np.floor(u), v - np.floor(v)
+    i1, j1 = (i + 1) % size, (j + 1) % size
+    deltas = ((1 - fu) * (1 - fv) * table_deltas[:, i, j] + fu * (1 - fv) * table_deltas[:, i1, j] +
+              (1 - fu) * fv * table_deltas[:, i, j1] + fu * fv * table_deltas[:, i1, j1])
+    return np.moveaxis(deltas, 0, -1), i, j
+
+
+def load_table() -> Optional[np.ndarray]:
+    global _table
+    if _table is None and os.path.exists(DELTAS_TABLE_FILE):
+        _table = np.load(DELTAS_TABLE_FILE)
+    return _table
+
+
+def table_deltas(x0, y0, x3, y3, ang0, ang3) -> Optional[tuple[float, float]]:
+    """ interpolated optimal deltas, None if table is absent or its error in this cell is out of bound """
+    table = load_table()
+    if table is None:
+        return None
+    dist, rel_ang0, rel_ang3 = canonical_angles(x0, y0, x3, y3, ang0, ang3)
+    normalized_deltas, i, j = interpolate(table[:2], rel_ang0, rel_ang3, table.shape[-1])
+    if not table[2, i, j] <= DELTAS_TABLE_ERROR_BOUND:
+        return None
+    return normalized_deltas[0] * dist, normalized_deltas[1] * dist
+
+
+def batch_table_deltas(geometry: np.ndarray) -> np.ndarray:
+    """ table_deltas for geometry rows (x0, y0, x3, y3, ang0, ang3) (N, 6), returns deltas (N, 2),
+    nan in rows where table is absent or not trusted """
+    geometry = np.asarray(geometry, dtype=float).reshape(-1, 6)
+    result = np.full((len(geometry), 2), np.nan)
+    table = load_table()
+    if table is None:
+        return result
+    x0, y0, x3, y3, ang0, ang3 = geometry.T
+    chord_angle = np.arctan2(y3 - y0, x3 - x0)
+    dist = np.hypot(x3 - x0, y3 - y0)
+    normalized_deltas, i, j = interpolate(table[:2], (ang0 - chord_angle) % (2 * math.pi),
+                                          (ang3 - chord_angle) % (2 * math.pi), table.shape[-1])
+    trusted = table[2, i, j] <= DELTAS_TABLE_ERROR_BOUND
+    result[trusted] = normalized_deltas[trusted] * dist[trusted, None]
+    return result
+
+
+if __name__ == "__main__":
+    deltas_table = build_table()
+    np.save(DELTAS_TABLE_FILE, deltas_table)
+    print("cells within error bound: {} of {}".format(np.sum(deltas_table[2] <= DELTAS_TABLE_ERROR_BOUND),
+                                                      deltas_table[2].size))
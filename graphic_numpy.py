@@ -4,23 +4,31 @@ import numpy as np
 from typing import Callable
 import scipy
 from scipy.spatial.transform import Rotation as R
-from scipy.optimize import minimize, Bounds
+from scipy.optimize import minimize, Bounds, OptimizeResult
 import bezier
 from matplotlib import pyplot as plt
 from sympy import Point2D  # , Line2D, Ray2D
 import math
 from numbers import Real
-import time
 
 from cubic_curvature import deltas_optimization
+from deltas_table import table_deltas, canonical_angles
+from deltas_cache import cached_deltas_optimization
+from cubic_flattening import flatten_cubic
+from cubic_bounds import cubic_bounding_box
+from arc_length import ArcLengthTable
+from optimizer_metrics import timed, solve_result_info, result_source, OPTIMIZER_METRICS, enable_metrics
 
 
+USE_DELTAS_TABLE = True
+USE_DELTAS_CACHE = True
+WARM_START_MIN_STEP = 5e-3  # initial simplex size in units of chord length
+WARM_START_MAX_STEP = 5e-2
+WARM_START_STEP_PER_RAD = 0.5
+PLOT_RELATIVE_TOLERANCE = 1e-3  # in units of chord length
+ZOOM_REFINE_RATIO = 2  # curve is solved again when it was solved with this times coarser tolerance
 
-# class Point2D:
-#     def __init__(self, x, y):
-#         self.coords = np.array([x, y])
-
-TIME_EVALUATION = True
+_DEFAULT = object()  # argument is taken from curve, None means no time budget or full precision
 
 
 class Angle:
@@ -76,6 +84,43 @@ class Angle:
         return self.angle_mpi2_ppi2 * 180 / math.pi
 
 
+class FloatPoint2D:
+    """ float point of connection curve, sympy Point2D is orders slower, so it is converted at API edge """
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: Real, y: Real):
+        self.x = float(x)
+        self.y = float(y)
+
+    @classmethod
+    def from_point(cls, pnt) -> FloatPoint2D:
+        """ from any point with x and y (sympy or graphical_object Point2D) or sequence (x, y): tuple, list, array """
+        if isinstance(pnt, FloatPoint2D):
+            return pnt
+        if hasattr(pnt, "x") and hasattr(pnt, "y"):
+            return cls(pnt.x, pnt.y)
+        x, y = pnt
+        return cls(x, y)
+
+    def __repr__(self):
+        return "{}({}, {})".format(self.__class__.__name__, self.x, self.y)
+
+    __str__ = __repr__
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FloatPoint2D) and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    @property
+    def coords(self) -> tuple[float, float]:
+        return self.x, self.y
+
+    def distance(self, other: FloatPoint2D) -> float:
+        return math.hypot(other.x - self.x, other.y - self.y)
+
+
 def angle_rad_difference(a2: Angle, a1: Angle) -> float:
     """ signed difference between 2 angles """
     delta_in_2pi = a2.angle_0_2pi - a1.angle_0_2pi
@@ -84,44 +129,95 @@ def angle_rad_difference(a2: Angle, a1: Angle) -> float:
 
 class UniversalConnectionCurve:
     """ Based on cubic bezier curve CubicBezier """
-    def __init__(self, pnt_start: Point2D, pnt_end: Point2D,
-                 angle_start: Angle = None, angle_end: Angle = None):
-        self._pnt_start = pnt_start
-        self._pnt_end = pnt_end
+    def __init__(self, pnt_start: FloatPoint2D, pnt_end: FloatPoint2D,
+                 angle_start: Angle = None, angle_end: Angle = None, time_budget: float = None,
+                 deltas: tuple[Real, Real] = None, tolerance: float = None):
+        """ time_budget in seconds bounds each optimization, curve is then not converged until refine
+        deltas are already optimized deltas (from bulk optimization), then curve is not optimized
+        tolerance of deltas in scene units, which is not visible at current zoom, None is full precision
+        points may be sympy Point2D or (x, y) sequences too, curve keeps FloatPoint2D """
+        self.time_budget = time_budget
+        self.converged = False
+        self.tolerance = tolerance
+        self.solved_tolerance: float = None  # tolerance of current control points
+        self._pnt_start = FloatPoint2D.from_point(pnt_start)
+        self._pnt_end = FloatPoint2D.from_point(pnt_end)
         self._angle_start = angle_start
         self._angle_end = angle_end
-        if TIME_EVALUATION:
-            self.sum_time_float_eval = 0
-            self.sum_time_min_eval = 0
-        self.optimize_curvature()
+        # (relative start angle, relative end angle, normalized deltas) of last optimization for warm start
+        self.last_solution: tuple[float, float, np.ndarray] = None
+        # control points are optimized on first access after geometry change
+        self._stale = True
+        self._start_dir_point: FloatPoint2D = None
+        self._end_dir_point: FloatPoint2D = None
+        self._arc_length_table: ArcLengthTable = None
+        if deltas is not None:
+            self.apply_solution(self.geometry(), OptimizeResult(x=np.array(deltas, dtype=float)))
+
+    def update(self, pnt_start: FloatPoint2D, pnt_end: FloatPoint2D, angle_start: Angle, angle_end: Angle,
+               optimize: bool = True):
+        """ changes all geometry at once, setters only mark curve stale, so it costs one optimization
+        on next access to control points, without optimize control points are provisional until apply_solution """
+        self.pnt_start = pnt_start
+        self.pnt_end = pnt_end
+        self.angle_start = angle_start
+        self.angle_end = angle_end
+        if not optimize:
+            self.provisional_dir_points()
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+    def invalidate(self):
+        self._stale = True
+        self._arc_length_table = None
+
+    def evaluate_if_stale(self):
+        if self._stale:
+            self.optimize_curvature()
 
     def eval_dir_points(self, deltas: tuple[Real, Real]):
-        self.start_dir_point = Point2D(self.pnt_start.x + deltas[0] * math.cos(self.angle_start.angle_0_2pi),
-                                       self.pnt_start.y + deltas[0] * math.sin(self.angle_start.angle_0_2pi))
-        self.end_dir_point = Point2D(self.pnt_end.x + deltas[1] * math.cos(self.angle_end.angle_0_2pi),
-                                     self.pnt_end.y + deltas[1] * math.sin(self.angle_end.angle_0_2pi))
+        self._start_dir_point = FloatPoint2D(self.pnt_start.x + deltas[0] * math.cos(self.angle_start.angle_0_2pi),
+                                             self.pnt_start.y + deltas[0] * math.sin(self.angle_start.angle_0_2pi))
+        self._end_dir_point = FloatPoint2D(self.pnt_end.x + deltas[1] * math.cos(self.angle_end.angle_0_2pi),
+                                           self.pnt_end.y + deltas[1] * math.sin(self.angle_end.angle_0_2pi))
+        self._arc_length_table = None
+        self._stale = False
+
+    @property
+    def start_dir_point(self) -> FloatPoint2D:
+        self.evaluate_if_stale()
+        return self._start_dir_point
+
+    @property
+    def end_dir_point(self) -> FloatPoint2D:
+        self.evaluate_if_stale()
+        return self._end_dir_point
 
     def nodes_for_print(self) -> np.ndarray:
-        return np.array([[float(p_.x) for p_ in self.points],
-                         [float(p_.y) for p_ in self.points]])
+        return np.array([[p_.x for p_ in self.points],
+                         [p_.y for p_ in self.points]])
 
     @property
-    def pnt_start(self) -> Point2D:
+    def pnt_start(self) -> FloatPoint2D:
         return self._pnt_start
 
     @pnt_start.setter
-    def pnt_start(self, val: Point2D):
-        self._pnt_start = val
-        self.optimize_curvature()
+    def pnt_start(self, val: FloatPoint2D):
+        """ only marks curve stale """
+        self._pnt_start = FloatPoint2D.from_point(val)
+        self.invalidate()
 
     @property
-    def pnt_end(self) -> Point2D:
+    def pnt_end(self) -> FloatPoint2D:
         return self._pnt_end
 
     @pnt_end.setter
-    def pnt_end(self, val: Point2D):
-        self._pnt_end = val
-        self.optimize_curvature()
+    def pnt_end(self, val: FloatPoint2D):
+        """ only marks curve stale """
+        self._pnt_end = FloatPoint2D.from_point(val)
+        self.invalidate()
 
     @property
     def angle_start(self) -> Angle:
@@ -129,8 +225,9 @@ class UniversalConnectionCurve:
 
     @angle_start.setter
     def angle_start(self, val: Angle):
+        """ only marks curve stale """
         self._angle_start = val
-        self.optimize_curvature()
+        self.invalidate()
 
     @property
     def angle_end(self) -> Angle:
@@ -138,12 +235,13 @@ class UniversalConnectionCurve:
 
     @angle_end.setter
     def angle_end(self, val: Angle):
+        """ only marks curve stale """
         self._angle_end = val
-        self.optimize_curvature()
+        self.invalidate()
 
     @property
     def base_distance(self):
-        return float(self.pnt_start.distance(self.pnt_end))
+        return self.pnt_start.distance(self.pnt_end)
 
     @property
     def start_approximation(self):
@@ -169,28 +267,124 @@ class UniversalConnectionCurve:
     def p3(self):
         return self.pnt_end
 
-    def optimize_curvature(self):
-        x0 = float(self.p0.x)
-        y0 = float(self.p0.y)
-        x3 = float(self.p3.x)
-        y3 = float(self.p3.y)
-        ang0 = self.angle_start.angle_0_2pi
-        ang3 = self.angle_end.angle_0_2pi
-        if TIME_EVALUATION:
-            start_time = time.time()
-        res = deltas_optimization(x0, y0, x3, y3, ang0, ang3)
-        if TIME_EVALUATION:
-            self.sum_time_min_eval += (time.time() - start_time)
-        self.eval_dir_points(res.x)
+    def refine(self):
+        """ finishes optimization stopped by time budget or solved coarser than current tolerance """
+        if self._stale or not self.converged or self.needs_refinement():
+            self.optimize_curvature(time_budget=None)
+
+    def needs_refinement(self) -> bool:
+        """ current control points were solved much coarser than current tolerance (curve was zoomed in) """
+        if self.solved_tolerance is None:
+            return False
+        return self.tolerance is None or self.solved_tolerance > ZOOM_REFINE_RATIO * self.tolerance
+
+    @timed("optimize_curvature", solve_result_info)
+    def optimize_curvature(self, time_budget: float = _DEFAULT):
+        """ time_budget is curve time_budget by default """
+        geometry = self.geometry()
+        res = self.solve(geometry, time_budget)
+        self.apply_solution(geometry, res)
+        return res
+
+    def geometry(self) -> tuple[float, float, float, float, float, float]:
+        """ x0, y0, x3, y3, ang0, ang3 """
+        return (self.p0.x, self.p0.y, self.p3.x, self.p3.y,
+                self.angle_start.angle_0_2pi, self.angle_end.angle_0_2pi)
+
+    @timed("solve", solve_result_info)
+    def solve(self, geometry: tuple[float, float, float, float, float, float],
+              time_budget: float = _DEFAULT, tolerance: float = _DEFAULT) -> OptimizeResult:
+        """ optimal deltas for given geometry, curve is not changed, so it can be called from worker thread
+        time_budget and tolerance are curve ones by default, result has tolerance it was solved with """
+        if time_budget is _DEFAULT:
+            time_budget = self.time_budget
+        if tolerance is _DEFAULT:
+            tolerance = self.tolerance
+        x0, y0, x3, y3, ang0, ang3 = geometry
+        deltas = table_deltas(x0, y0, x3, y3, ang0, ang3) if USE_DELTAS_TABLE else None
+        if deltas is not None:
+            res = OptimizeResult(x=np.array(deltas), nfev=0, success=True, message="Interpolated from deltas table",
+                                 source="table", tolerance=None)
+        else:
+            dist, rel_ang0, rel_ang3 = canonical_angles(x0, y0, x3, y3, ang0, ang3)
+            warm_start = self.warm_start(dist, rel_ang0, rel_ang3)
+            if USE_DELTAS_CACHE:
+                res = cached_deltas_optimization(x0, y0, x3, y3, ang0, ang3, time_budget=time_budget,
+                                                 xatol=tolerance, **warm_start)
+            else:
+                res = deltas_optimization(x0, y0, x3, y3, ang0, ang3, time_budget=time_budget, xatol=tolerance,
+                                          **warm_start)
+                res.tolerance = tolerance
         return res
 
+    def apply_solution(self, geometry: tuple[float, float, float, float, float, float], res: OptimizeResult):
+        """ geometry should be current geometry of curve """
+        dist, rel_ang0, rel_ang3 = canonical_angles(*geometry)
+        # Nelder-Mead stopped by maxiter or maxfev is not converged either, so it is refined later
+        self.converged = res.get("success", True) and not res.get("deadline_exceeded", False)
+        self.solved_tolerance = res.get("tolerance")
+        # deltas of coincident endpoints are zero for any angles, they are no warm start
+        self.last_solution = (rel_ang0, rel_ang3, res.x / dist) if dist > 0 else None
+        self.eval_dir_points(res.x)
+
+    def provisional_dir_points(self):
+        """ control points with last normalized deltas for current geometry, until it is optimized """
+        x0, y0, x3, y3, _, _ = self.geometry()
+        dist = math.hypot(x3 - x0, y3 - y0)
+        normalized_deltas = (3e-1, 3e-1) if self.last_solution is None else self.last_solution[2]
+        self.eval_dir_points((normalized_deltas[0] * dist, normalized_deltas[1] * dist))
+        self.converged = False
+
+    def warm_start(self, dist: float, rel_ang0: float, rel_ang3: float) -> dict:
+        """ start from last solution with search region growing with angles change """
+        if self.last_solution is None:
+            return {}
+        last_rel_ang0, last_rel_ang3, last_normalized_deltas = self.last_solution
+        angles_change = max(abs((rel_ang0 - last_rel_ang0 + math.pi) % (2 * math.pi) - math.pi),
+                            abs((rel_ang3 - last_rel_ang3 + math.pi) % (2 * math.pi) - math.pi))
+        step = min(max(WARM_START_STEP_PER_RAD * angles_change, WARM_START_MIN_STEP), WARM_START_MAX_STEP)
+        return {"start_deltas": last_normalized_deltas * dist, "start_step": step}
+
+    def control_points(self) -> np.ndarray:
+        """ (4, 2) """
+        return self.nodes_for_print().T
+
+    def bounding_box(self) -> tuple[float, float, float, float]:
+        """ exact (x min, y min, x max, y max) by roots of derivative """
+        return cubic_bounding_box(self.control_points())
+
+    def flatten(self, tolerance: float) -> np.ndarray:
+        """ polyline (N, 2) within tolerance of curve in scene units """
+        return flatten_cubic(self.control_points(), tolerance)
+
+    @property
+    def arc_length_table(self) -> ArcLengthTable:
+        """ evaluated on first use after control points change, table is dropped by invalidate and eval_dir_points """
+        self.evaluate_if_stale()
+        if self._arc_length_table is None:
+            self._arc_length_table = ArcLengthTable(self.control_points())
+        return self._arc_length_table
+
+    @property
+    def length(self) -> float:
+        return self.arc_length_table.length
+
+    def point_at_length(self, length: Real) -> FloatPoint2D:
+        """ point on given arc length from pnt_start, for arrowheads and labels """
+        return FloatPoint2D(*self.arc_length_table.point_at(length))
+
+    def angle_at_length(self, length: Real) -> Angle:
+        return Angle(self.arc_length_table.angle_at(length))
+
     def plot(self):
-        curve = bezier.Curve.from_nodes(self.nodes_for_print())
-        curve.plot(100)
+        polyline = self.flatten(PLOT_RELATIVE_TOLERANCE * self.base_distance)
+        plt.plot(polyline[:, 0], polyline[:, 1])
+        plt.gca().set_aspect("equal")
         plt.show()
 
 
 if __name__ == "__main__":
+    enable_metrics()
     test_1 = False
     if test_1:
         p = Point2D(1, 2)
@@ -275,45 +469,140 @@ if __name__ == "__main__":
         optim_result = cc.optimize_curvature()
         cc.eval_dir_points(tuple(optim_result.x))
         print("optim_result", optim_result)
-        nfev = optim_result.nfev
-        if TIME_EVALUATION:
-            print("sum time float", cc.sum_time_float_eval)
-            print("sum time mean float", cc.sum_time_float_eval/nfev)
-            print("sum time min", cc.sum_time_min_eval)
+        print(OPTIMIZER_METRICS.report())
         curve = bezier.Curve.from_nodes(cc.nodes_for_print())
         curve.plot(100)
         plt.show()
 
     test_6 = True
     if test_6:
-        curves = [
-        UniversalConnectionCurve(Point2D(0e+0, 0e+0), Point2D(1e+3, 1e+3),
-                                      Angle(math.atan(0.5)), Angle(-0.5*math.pi-math.atan(0.5))),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 1),
-                                      Angle(math.atan(0.5)), Angle(-0.5*math.pi+math.atan(0.5))),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 1),
-                                      Angle(math.atan(0.5)), Angle(0)),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 1),
-                                      Angle(math.atan(0.5)), Angle(math.pi)),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 1),
-                                      Angle(math.atan(0.5)), Angle(math.pi+math.atan(0.5))),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 1),
-                                      Angle(-math.atan(0.5)), Angle(math.pi-math.atan(0.5))),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(2, 10),
-                                      Angle(-math.pi/2), Angle(math.pi/2)),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 1),
-                                      Angle(math.atan(0.5)), Angle(-0.5*math.pi)),
-        UniversalConnectionCurve(Point2D(0, 0), Point2D(1, 0),
-                                      Angle(0), Angle(math.pi))
-        ]
+        from cubic_curvature import HAND_PICKED_CASES
+        curves = [UniversalConnectionCurve((x0, y0), (x3, y3), Angle(ang0), Angle(ang3))
+                  for x0, y0, x3, y3, ang0, ang3 in HAND_PICKED_CASES]
         cc = curves[0]
-        if TIME_EVALUATION:
-            print("sum time float", cc.sum_time_float_eval)
-            print("sum time min", cc.sum_time_min_eval)
         # cc.pnt_start = Point2D(0, 1)
         # cc.angle_end = Angle(math.atan(0.5))
         cc.plot()
+        print(OPTIMIZER_METRICS.report())
 
         # curve = bezier.Curve.from_nodes(cc.nodes_for_print())
         # curve.plot(100)
         # plt.show()
+
+    test_7 = True
+    if test_7:
+        # warm-started drag solve is cached apart from cold solve and does not serve full precision request
+        from deltas_cache import DELTAS_CACHE
+        USE_DELTAS_TABLE = False
+        DELTAS_CACHE.clear()
+        cc = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.5))
+        cc.optimize_curvature()
+        assert len(DELTAS_CACHE) == 1
+        cc.angle_end = Angle(2.52)
+        res = cc.optimize_curvature()
+        assert res.nfev and res.tolerance is None and len(DELTAS_CACHE) == 2
+        res = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.52)).optimize_curvature()
+        assert result_source(res) == "optimization"
+        USE_DELTAS_TABLE = True
+
+    test_8 = True
+    if test_8:
+        # solve with connector tolerance at zoom 1 (custom_gc CONNECTOR_PIXEL_TOLERANCE) fills cache,
+        # cached entry serves requests with same or coarser tolerance only
+        from deltas_cache import DELTAS_CACHE
+        USE_DELTAS_TABLE = False
+        DELTAS_CACHE.clear()
+        cc = UniversalConnectionCurve((0, 0), (5e+2, 1e+2), Angle(0.3), Angle(2.5), tolerance=0.25)
+        res = cc.optimize_curvature()
+        assert res.nfev and len(DELTAS_CACHE) == 1 and abs(res.tolerance - 0.25) < 1e-9
+        scaled = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.5), tolerance=0.5)
+        res = scaled.optimize_curvature()
+        assert result_source(res) == "cache" and abs(res.tolerance - 0.5) < 1e-9 and not scaled.needs_refinement()
+        finer = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.5), tolerance=0.15)
+        res = finer.optimize_curvature()
+        assert result_source(res) == "optimization" and abs(res.tolerance - 0.15) < 1e-9
+        res = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.5), tolerance=0.2).optimize_curvature()
+        assert result_source(res) == "cache" and abs(res.tolerance - 0.15) < 1e-9
+        res = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.5)).optimize_curvature()
+        assert result_source(res) == "optimization" and res.tolerance is None
+        USE_DELTAS_TABLE = True
+
+    test_9 = True
+    if test_9:
+        # float points from points and sequences are equal and hashable
+        float_points = {FloatPoint2D.from_point(pnt) for pnt in [Point2D(1, 2), (1, 2), [1, 2], np.array([1., 2.])]}
+        assert float_points == {FloatPoint2D(1, 2)}
+
+    test_10 = True
+    if test_10:
+        # length after geometry change is of current curve, table is kept until next change
+        cc = UniversalConnectionCurve((0, 0), (1e+2, 3e+1), Angle(0.3), Angle(2.0))
+        cc.optimize_curvature()
+        cc.pnt_end = (4e+2, 3e+2)
+        table = cc.arc_length_table
+        assert cc.length == ArcLengthTable(cc.control_points()).length
+        assert all(cc.arc_length_table is table for _ in range(3))
+        cc.angle_end = Angle(2.1)
+        assert cc.length == ArcLengthTable(cc.control_points()).length
+        assert cc.arc_length_table is not table
+
+    test_11 = True
+    if test_11:
+        # setters only mark curve stale, read optimizes current geometry once
+        cc = UniversalConnectionCurve((0, 0), (1e+2, 3e+1), Angle(0.3), Angle(2.0))
+        cc.optimize_curvature()
+        cc.pnt_end = (1.2e+2, 4e+1)
+        cc.angle_start = Angle(0.4)
+        assert cc.stale
+        _, _, p2, p3 = cc.points
+        assert p3 == FloatPoint2D(1.2e+2, 4e+1) and not cc.stale
+        assert abs((p2.x - p3.x) * math.sin(2.0) - (p2.y - p3.y) * math.cos(2.0)) < 1e-9
+
+    test_12 = True
+    if test_12:
+        # coincident endpoints with zoom tolerance give point curve, which is not cached
+        from deltas_cache import DELTAS_CACHE
+        USE_DELTAS_TABLE = False
+        DELTAS_CACHE.clear()
+        cc = UniversalConnectionCurve((3, 3), (3, 3), Angle(0.3), Angle(2.0), tolerance=0.25)
+        res = cc.optimize_curvature()
+        assert res.success and res.tolerance is None and len(DELTAS_CACHE) == 0
+        assert cc.p1 == cc.p2 == FloatPoint2D(3, 3) and cc.last_solution is None
+        USE_DELTAS_TABLE = True
+
+    test_13 = True
+    if test_13:
+        # drag back and forth over the same positions is served from cache after first pass
+        from deltas_cache import DELTAS_CACHE
+        USE_DELTAS_TABLE = False
+        DELTAS_CACHE.clear()
+        cc = UniversalConnectionCurve((0, 0), (1e+3, 2e+2), Angle(0.3), Angle(2.5))
+        cc.optimize_curvature()
+        positions = [(1e+3, 2e+2 + 1e+1 * i) for i in range(1, 11)]
+        sources = []
+        for pnt in positions + positions[::-1] + positions:
+            cc.pnt_end = pnt
+            sources.append(result_source(cc.optimize_curvature()))
+        assert sources[10:] == ["cache"] * 20 and DELTAS_CACHE.hits == 20
+        USE_DELTAS_TABLE = True
+
+    test_14 = True
+    if test_14:
+        # cell of deltas table out of error bound falls back to full optimization
+        from deltas_table import load_table, DELTAS_TABLE_ERROR_BOUND
+        USE_DELTAS_CACHE = False
+        table = load_table()
+        i, j = np.argwhere(table[2] <= DELTAS_TABLE_ERROR_BOUND)[0]
+        size = table.shape[-1]
+        cell_angles = ((i + 0.5) * 2 * math.pi / size, (j + 0.5) * 2 * math.pi / size)
+        cc = UniversalConnectionCurve((0, 0), (1e+2, 0), Angle(cell_angles[0]), Angle(cell_angles[1]))
+        assert result_source(cc.optimize_curvature()) == "table"
+        cell_error = table[2, i, j]
+        table[2, i, j] = np.inf
+        try:
+            assert table_deltas(*cc.geometry()) is None
+            res = cc.solve(cc.geometry())
+            assert result_source(res) == "optimization" and res.nfev > 0
+        finally:
+            table[2, i, j] = cell_error
+        USE_DELTAS_CACHE = True
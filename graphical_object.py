@@ -9,6 +9,7 @@ from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject
 
 from nv_config import ANGLE_EQUAL_EVAL_PRECISION, ANGLE_EQUAL_VIEW_PRECISION, COORD_EQUAL_PRECISION, H_CLICK_ZONE
 from custom_enum import CustomEnum
+from arc_length import ArcLengthTable, bernstein
 
 
 class CECurveType(CustomEnum):
@@ -69,6 +70,51 @@ def cut_optimization(func, *args, borders: tuple[Real, Real], maxormin: CEMaxMin
     return curr_x_value, curr_f_value
 
 
+GOLDEN_RATIO_INVERSE = (math.sqrt(5) - 1) / 2
+DIVISION_STEP_HALVINGS = 0.5 ** np.arange(40)  # candidate steps of adaptive divisions of curves by t
+
+
+def batch_cut_optimization(func, *args, borders, maxormin=CEMaxMin('min'),
+                           precision: float = ANGLE_EQUAL_EVAL_PRECISION) -> tuple[np.ndarray, np.ndarray]:
+    """ N independent 1D optimizations by golden section, all steps are one call of func on arrays
+    func(x (N,), *args) -> (N,), args are arrays (N,) or scalars, borders (N, 2),
+    maxormin is CEMaxMin for all problems or sequence of them for each problem
+    each step reuses one inner point of previous step, so func is called once per step
+    returns x and function values (N,) as cut_optimization, nan function values are worst """
+    borders = np.sort(np.asarray(borders, dtype=float).reshape(-1, 2), axis=-1)
+    if isinstance(maxormin, (str, CEMaxMin)):
+        k = np.full(len(borders), 1. if maxormin == 'min' else -1.)
+    else:
+        k = np.array([1. if direction == 'min' else -1. for direction in maxormin])
+
+    def signed_func(x):
+        return np.nan_to_num(k * np.asarray(func(x, *args), dtype=float), nan=np.inf)
+
+    a, b = borders[:, 0], borders[:, 1]
+    c = b - GOLDEN_RATIO_INVERSE * (b - a)
+    d = a + GOLDEN_RATIO_INVERSE * (b - a)
+    fc, fd = signed_func(c), signed_func(d)
+    # all intervals shrink by golden ratio each step, problems with smaller borders just get more precise
+    max_width = np.max(b - a) if len(borders) else 0.
+    steps = max(math.ceil(math.log(precision / max_width) / math.log(GOLDEN_RATIO_INVERSE)), 0) if max_width > 0 else 0
+    for _ in range(steps):
+        left = fc < fd  # minimum is in [a, d]
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        x_new = np.where(left, b - GOLDEN_RATIO_INVERSE * (b - a), a + GOLDEN_RATIO_INVERSE * (b - a))
+        f_new = signed_func(x_new)
+        c, d = np.where(left, x_new, d), np.where(left, c, x_new)
+        fc, fd = np.where(left, f_new, fd), np.where(left, fc, f_new)
+    x = np.where(fc < fd, c, d)
+    return x, k * np.minimum(fc, fd)
+
+
+def longest_allowed_step(steps: np.ndarray, allowed: np.ndarray) -> float:
+    """ first of decreasing steps that is allowed, the smallest one if none is """
+    if not allowed.any():
+        return float(steps[-1])
+    return float(steps[np.argmax(allowed)])
+
+
 def distance_point_to_point(pnt_1: Point2D, pnt_2: Point2D) -> float:
     return math.dist(pnt_1.coords, pnt_2.coords)
 
@@ -135,6 +181,54 @@ def normal_distance(pnt: Point2D, line: Line2D) -> float:
     return distance_point_to_point(normal(pnt, line)[1], pnt)
 
 
+def line_coefficients(lines: list[Line2D]) -> np.ndarray:
+    """ (N, 3) array of a, b, c of lines for batched line kernels """
+    return np.array([(line.a, line.b, line.c) for line in lines], dtype=float).reshape(-1, 3)
+
+
+def _points_coords(points: Union[np.ndarray, PointArray]) -> np.ndarray:
+    return points.coords if isinstance(points, PointArray) else np.asarray(points, dtype=float).reshape(-1, 2)
+
+
+def lines_intersections(lines_1: np.ndarray, lines_2: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ intersection points (N, 2) of lines given by coefficients (N, 3) by Cramer's rule,
+    returns points, parallel and equivalent masks as lines_intersection exceptions, points are nan for them """
+    a1, b1, c1 = np.asarray(lines_1, dtype=float).reshape(-1, 3).T
+    a2, b2, c2 = np.asarray(lines_2, dtype=float).reshape(-1, 3).T
+    norm_1, norm_2 = np.hypot(a1, b1), np.hypot(a2, b2)
+    determinant = a1 * b2 - a2 * b1
+    # sine of angle between lines
+    parallel = np.abs(determinant) < ANGLE_EQUAL_EVAL_PRECISION * norm_1 * norm_2
+    same_direction = np.sign(a1 * a2 + b1 * b2)
+    equivalent = parallel & (np.abs(c1 / norm_1 - same_direction * c2 / norm_2) < COORD_EQUAL_PRECISION)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        points = np.column_stack([(b1 * c2 - b2 * c1) / determinant, (a2 * c1 - a1 * c2) / determinant])
+    points[parallel] = np.nan
+    return points, parallel & ~equivalent, equivalent
+
+
+def normal_lines(points: Union[np.ndarray, PointArray], lines: np.ndarray) -> np.ndarray:
+    """ coefficients (N, 3) of lines normal to lines (N, 3) through points (N, 2) """
+    x, y = _points_coords(points).T
+    a, b, _ = np.asarray(lines, dtype=float).reshape(-1, 3).T
+    return np.column_stack([b, -a, a * y - b * x])
+
+
+def normal_foot_points(points: Union[np.ndarray, PointArray], lines: np.ndarray) -> np.ndarray:
+    """ closest points (N, 2) of lines (N, 3) to points (N, 2), as second value of normal """
+    coords = _points_coords(points)
+    a, b, c = np.asarray(lines, dtype=float).reshape(-1, 3).T
+    offset = (a * coords[:, 0] + b * coords[:, 1] + c) / (a ** 2 + b ** 2)
+    return coords - offset[:, None] * np.column_stack([a, b])
+
+
+def normal_distances(points: Union[np.ndarray, PointArray], lines: np.ndarray) -> np.ndarray:
+    """ distances (N,) from points (N, 2) to lines (N, 3), as normal_distance """
+    coords = _points_coords(points)
+    a, b, c = np.asarray(lines, dtype=float).reshape(-1, 3).T
+    return np.abs(a * coords[:, 0] + b * coords[:, 1] + c) / np.hypot(a, b)
+
+
 def parallel_line_throw_point(pnt: Point2D, line: Line2D, assertion_not_equal_given: bool = True) -> Line2D:
     """ returns line parallel given throw given point """
     if assertion_not_equal_given:
@@ -173,15 +267,46 @@ def pnt_between(pnt: Point2D, pnt_1: Point2D, pnt_2: Point2D) -> bool:
     return (distance_point_to_point(pnt, pnt_1) <= distance_point_to_point(pnt_1, pnt_2)) and (distance_point_to_point(pnt, pnt_2) <= distance_point_to_point(pnt_1, pnt_2))
 
 
+def bezier_coordinate(t: float, coords: list[float]) -> float:
+    """ coordinate at t of line segment or quadratic bezier with coordinates of control points coords (2 or 3) """
+    if len(coords) == 2:
+        return coords[0] + t * (coords[1] - coords[0])
+    return (1 - t) * ((1 - t) * coords[0] + 2 * t * coords[1]) + t * t * coords[2]
+
+
+def bezier_max_curvature(pnt_1: Point2D, pnt_2: Point2D, pnt_control: Point2D) -> float:
+    """ max of bezier_curvature on [0, 1], scalar bezier_max_curvature_array """
+    (x1, y1), (x2, y2), (x3, y3) = pnt_1.coords, pnt_2.coords, pnt_control.coords
+    ux, uy = x3 - x1, y3 - y1
+    wx, wy = x2 - x1 - 2 * ux, y2 - y1 - 2 * uy
+    w2 = wx * wx + wy * wy
+    t = min(max(-(ux * wx + uy * wy) / w2, 0.), 1.) if w2 > 0 else 0.
+    return bezier_curvature_array(t, x1, y1, x2, y2, x3, y3)
+
+
 def bezier_curvature(t: Real, pnt_1: Point2D, pnt_2: Point2D, pnt_control: Point2D):
     """ t is float between 0 and 1 """
-    x1, y1 = pnt_1.coords
-    x2, y2 = pnt_2.coords
-    x3, y3 = pnt_control.coords
-    return abs(0.5 * (-(2 * (x3 - x1) + x1 - x2) * (2 * (y3 - y1) * t - (y3 - y1) + t * y1 - t * y2) +
-                      (2 * (y3 - y1) + y1 - y2) * (2 * (x3 - x1) * t - (x3 - x1) + t * x1 - t * x2)) *
-               ((2 * (x3 - x1) * t - (x3 - x1) + t * x1 - t * x2) ** 2 + (
-                       2 * (y3 - y1) * t - (y3 - y1) + t * y1 - t * y2) ** 2) ** (-1.5))
+    return bezier_curvature_array(t, *pnt_1.coords, *pnt_2.coords, *pnt_control.coords)
+
+
+def bezier_curvature_array(t, x1, y1, x2, y2, x3, y3):
+    """ bezier_curvature for arrays of t and coordinates of points (pnt_1, pnt_2, pnt_control)
+    half of derivative is u + t*w, cross product of it and w does not depend on t """
+    ux, uy = x3 - x1, y3 - y1
+    wx, wy = x1 - 2 * x3 + x2, y1 - 2 * y3 + y2
+    dx, dy = ux + t * wx, uy + t * wy
+    return 0.5 * abs(ux * wy - uy * wx) * (dx * dx + dy * dy) ** (-1.5)
+
+
+def bezier_max_curvature_array(x1, y1, x2, y2, x3, y3) -> tuple[np.ndarray, np.ndarray]:
+    """ parameter t and value of max curvature on [0, 1] for arrays of coordinates of (pnt_1, pnt_2, pnt_control)
+    curvature is max where |u + t*w| is min, that is vertex parameter -u*w/|w|^2 clipped to [0, 1] """
+    ux, uy = np.asarray(x3, dtype=float) - x1, np.asarray(y3, dtype=float) - y1
+    wx, wy = x2 - x1 - 2 * ux, y2 - y1 - 2 * uy
+    w2 = wx * wx + wy * wy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(np.where(w2 > 0, -(ux * wx + uy * wy) / w2, 0.), 0, 1)
+        return t, bezier_curvature_array(t, x1, y1, x2, y2, x3, y3)
 
 
 def bezier_tangent(t: Real, pnt_1: Point2D, pnt_2: Point2D, pnt_control: Point2D):
@@ -289,6 +414,148 @@ def angle_rad_difference(a2: Angle, a1: Angle) -> float:
     return delta_in_2pi if abs(delta_in_2pi) < math.pi else delta_in_2pi - math.copysign(2 * math.pi, delta_in_2pi)
 
 
+class PointArray:
+    """ array of points with Point2D semantics, operations are evaluated for all points at once """
+    __hash__ = None
+
+    def __init__(self, *args):
+        """ PointArray(xs, ys) PointArray(array (N, 2)) PointArray(list[Point2D]) """
+        if len(args) == 2:
+            self.coords = np.column_stack([np.asarray(args[0], dtype=float), np.asarray(args[1], dtype=float)])
+        else:
+            assert len(args) == 1, 'Expected 1 or 2 args'
+            if len(args[0]) and isinstance(args[0][0], Point2D):
+                self.coords = np.array([pnt.coords for pnt in args[0]], dtype=float)
+            else:
+                self.coords = np.asarray(args[0], dtype=float).reshape(-1, 2)
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, item) -> Union[Point2D, PointArray]:
+        if isinstance(item, (int, np.integer)):
+            return Point2D(*self.coords[item])
+        return PointArray(self.coords[item])
+
+    def __iter__(self):
+        return (Point2D(x, y) for x, y in self.coords)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.coords.tolist())
+
+    __str__ = __repr__
+
+    @staticmethod
+    def _other_coords(other) -> np.ndarray:
+        assert isinstance(other, (Point2D, PointArray)), 'Can operate only with points'
+        return np.array(other.coords) if isinstance(other, Point2D) else other.coords
+
+    def __add__(self, other) -> PointArray:
+        return PointArray(self.coords + self._other_coords(other))
+
+    def __sub__(self, other) -> PointArray:
+        return PointArray(self.coords - self._other_coords(other))
+
+    def __mul__(self, coefficient) -> PointArray:
+        """ coefficient is real or array of reals for each point """
+        if isinstance(coefficient, Real):
+            return PointArray(self.coords * coefficient)
+        return PointArray(self.coords * np.asarray(coefficient, dtype=float)[:, None])
+
+    def __eq__(self, other) -> np.ndarray:
+        """ elementwise equality with precision COORD_EQUAL_PRECISION """
+        return np.all(np.abs(self.coords - self._other_coords(other)) < COORD_EQUAL_PRECISION, axis=-1)
+
+    def distances(self, other) -> np.ndarray:
+        return np.linalg.norm(self.coords - self._other_coords(other), axis=-1)
+
+
+class AngleArray:
+    """ array of angles with Angle semantics """
+    __hash__ = None
+
+    def __init__(self, free_angles):
+        """ AngleArray(array of radians) AngleArray(list[Angle]) """
+        if len(free_angles) and isinstance(free_angles[0], Angle):
+            free_angles = [angle.free_angle for angle in free_angles]
+        self.free_angle = np.asarray(free_angles, dtype=float).reshape(-1)
+
+    def __len__(self):
+        return len(self.free_angle)
+
+    def __getitem__(self, item) -> Union[Angle, AngleArray]:
+        if isinstance(item, (int, np.integer)):
+            return Angle(self.free_angle[item])
+        return AngleArray(self.free_angle[item])
+
+    def __iter__(self):
+        return (Angle(free_angle) for free_angle in self.free_angle)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, np.round(self.angle_mpi2_ppi2, 7).tolist())
+
+    __str__ = __repr__
+
+    @staticmethod
+    def _other_free_angle(other):
+        assert isinstance(other, (Real, Angle, AngleArray, np.ndarray)), 'Can operate only with angles or reals'
+        if isinstance(other, (Angle, AngleArray)):
+            return other.free_angle
+        return other
+
+    def __add__(self, other) -> AngleArray:
+        return AngleArray(self.free_angle + self._other_free_angle(other))
+
+    def __sub__(self, other) -> AngleArray:
+        return AngleArray(self.free_angle - self._other_free_angle(other))
+
+    def __eq__(self, other) -> np.ndarray:
+        """ elementwise equality with precision ANGLE_EQUAL_EVAL_PRECISION as Angle:
+        directions of angles are compared, reals are compared with direction as is """
+        other_free_angle = self._other_free_angle(other)
+        if isinstance(other, (Angle, AngleArray)):
+            other_angle = AngleArray(np.atleast_1d(other_free_angle)).angle_mpi2_ppi2
+        else:
+            other_angle = np.asarray(other_free_angle, dtype=float)
+        return np.abs(self.angle_mpi2_ppi2 - other_angle) < ANGLE_EQUAL_EVAL_PRECISION
+
+    def __ne__(self, other) -> np.ndarray:
+        return ~self.__eq__(other)
+
+    @property
+    def angle_0_2pi(self) -> np.ndarray:
+        """ radian values in interval [0, 2pi) """
+        return self.free_angle % (2 * math.pi)
+
+    @property
+    def deg_angle_0_360(self) -> np.ndarray:
+        return self.angle_0_2pi * 180 / math.pi
+
+    @property
+    def angle_mpi2_ppi2(self) -> np.ndarray:
+        """ radian values in interval (-pi/2, pi/2] """
+        positive_angle = self.free_angle % math.pi
+        return np.where(positive_angle > math.pi / 2, positive_angle - math.pi, positive_angle)
+
+    @property
+    def deg_angle_m90_p90(self) -> np.ndarray:
+        return self.angle_mpi2_ppi2 * 180 / math.pi
+
+
+def angle_array_rad_difference(a2: AngleArray, a1: AngleArray) -> np.ndarray:
+    """ counterclockwise differences as angle_rad_difference """
+    delta_in_2pi = a2.angle_0_2pi - a1.angle_0_2pi
+    return np.where(np.abs(delta_in_2pi) < math.pi, delta_in_2pi, delta_in_2pi - np.copysign(2 * math.pi, delta_in_2pi))
+
+
 class Line2D:
     def __init__(self, pnt_1: Point2D, pnt_2: Point2D = None, angle: Angle = None):
         """ Line is solution of equation a*x + b*y + c = 0 """
@@ -384,6 +651,7 @@ class BoundedCurve(GeometryPrimitive):
     def __init__(self, pnt_1: Point2D, pnt_2: Point2D, angle_1: Angle = None, angle_2: Angle = None):
         self.pnt_1 = pnt_1
         self.pnt_2 = pnt_2
+        self._arc_length_table: ArcLengthTable = None
         evaluate_vector(pnt_1, pnt_2)  # for equal points check
         if angle_1 is None and angle_2 is None:
             self.geom_type = CECurveType('line_segment')
@@ -421,60 +689,72 @@ class BoundedCurve(GeometryPrimitive):
         float_angle_1 = self.angle_1.angle_mpi2_ppi2
         angle_between_points = Line2D(self.pnt_1, self.pnt_2).angle.angle_mpi2_ppi2
         min_angle, max_angle = min(angle_between_points, float_angle_1), max(angle_between_points, float_angle_1)
-        first_optimization = cut_optimization(self.max_curvature,
-                                  borders=(min_angle + ANGLE_EQUAL_VIEW_PRECISION,
-                                           max_angle - ANGLE_EQUAL_VIEW_PRECISION))
-        second_optimization = cut_optimization(self.max_curvature,
-                                  borders=(max_angle + ANGLE_EQUAL_VIEW_PRECISION,
-                                           min_angle + math.pi - ANGLE_EQUAL_VIEW_PRECISION))
-        return Angle(first_optimization[0]) if first_optimization[1] < second_optimization[1] else Angle(second_optimization[0])
+        # both angle regions are searched together, each step evaluates max curvature for both at once
+        angles, curvatures = batch_cut_optimization(self.max_curvatures, borders=[
+            (min_angle + ANGLE_EQUAL_VIEW_PRECISION, max_angle - ANGLE_EQUAL_VIEW_PRECISION),
+            (max_angle + ANGLE_EQUAL_VIEW_PRECISION, min_angle + math.pi - ANGLE_EQUAL_VIEW_PRECISION)])
+        return Angle(angles[0]) if curvatures[0] < curvatures[1] else Angle(angles[1])
 
     def max_curvature(self, float_angle: float) -> float:
-        angle = Angle(float_angle)
-        pnt_intersect = lines_intersection(Line2D(self.pnt_1, angle=self.angle_1), Line2D(self.pnt_2, angle=angle))
-        return cut_optimization(bezier_curvature, self.pnt_1, self.pnt_2, pnt_intersect,
-                                borders=(0, 1), maxormin=CEMaxMin('max'))[1]
+        """ scalar path of max_curvatures """
+        pnt_intersect = lines_intersection(Line2D(self.pnt_1, angle=self.angle_1),
+                                           Line2D(self.pnt_2, angle=Angle(float_angle)))
+        return bezier_max_curvature(self.pnt_1, self.pnt_2, pnt_intersect)
+
+    def max_curvatures(self, float_angles: np.ndarray) -> np.ndarray:
+        """ max curvature for array of end angles, maximum over t is in closed form """
+        count = len(float_angles)
+        end_angles = AngleArray(float_angles).angle_mpi2_ppi2
+        x2, y2 = self.pnt_2.coords
+        end_lines = np.column_stack([-np.sin(end_angles), np.cos(end_angles),
+                                     np.sin(end_angles) * x2 - np.cos(end_angles) * y2])
+        start_lines = np.tile(line_coefficients([Line2D(self.pnt_1, angle=self.angle_1)]), (count, 1))
+        intersections = lines_intersections(start_lines, end_lines)[0]
+        return bezier_max_curvature_array(*self.pnt_1.coords, x2, y2, intersections[:, 0], intersections[:, 1])[1]
 
     def point_by_param(self, t: Real) -> Point2D:
-        if t < 0:
-            t = 0
-        elif t > 1:
-            t = 1
-        x1, y1 = self.pnt_1.coords
-        x2, y2 = self.pnt_2.coords
-        if self.geom_type == 'line_segment':
-            x = x1 + t*(x2-x1)
-            y = y1 + t*(y2-y1)
-        else:
-            x3, y3 = self.bezier_control_point.coords
-            x = t*(t*x2 + (1 - t)*((x3-x1) + x1)) + (1 - t)*(t*((x3-x1) + x1) + x1*(1 - t))
-            y = t*(t*y2 + (1 - t)*((y3-y1) + y1)) + (1 - t)*(t*((y3-y1) + y1) + y1*(1 - t))
-        return Point2D(x, y)
+        t = min(max(t, 0), 1)
+        control_xs, control_ys = self.control_points.T.tolist()
+        return Point2D(bezier_coordinate(t, control_xs), bezier_coordinate(t, control_ys))
+
+    def points_by_params(self, t) -> PointArray:
+        """ point_by_param for array of t, control point is evaluated once """
+        t = np.clip(np.asarray(t, dtype=float).reshape(-1), 0, 1)
+        control_points = self.control_points
+        return PointArray(bernstein(t, len(control_points) - 1) @ control_points)
 
     def y_by_x(self, x: Real) -> float:
         x1, y1 = self.pnt_1.coords
         x2, y2 = self.pnt_2.coords
         if (x < min(x1, x2)) or (x > max(x1, x2)):
             raise OutBorderException("Given x is not in borders")
-        t = cut_optimization(lambda s: abs(self.point_by_param(s).x-x),
+        control_xs, control_ys = self.control_points.T.tolist()
+        t = cut_optimization(lambda s: abs(bezier_coordinate(s, control_xs) - x),
                              borders=(0, 1), maxormin=CEMaxMin('min'), precision=COORD_EQUAL_PRECISION)[0]
-        return self.point_by_param(t).y
+        return bezier_coordinate(t, control_ys)
+
+    def ys_by_xs(self, xs: np.ndarray) -> np.ndarray:
+        """ y_by_x for array of x, parameters t are searched together """
+        xs = np.asarray(xs, dtype=float)
+        x1, x2 = self.pnt_1.x, self.pnt_2.x
+        if np.any((xs < min(x1, x2)) | (xs > max(x1, x2))):
+            raise OutBorderException("Given x is not in borders")
+        control_points = self.control_points
+        degree = len(control_points) - 1
+        t = batch_cut_optimization(lambda s, x: np.abs(bernstein(s, degree) @ control_points[:, 0] - x), xs,
+                                   borders=np.tile([0., 1.], (len(xs), 1)), precision=COORD_EQUAL_PRECISION)[0]
+        return bernstein(t, degree) @ control_points[:, 1]
 
     def angle_by_param(self, t: Real) -> Angle:
-        if t < 0:
-            t = 0
-        elif t > 1:
-            t = 1
-        if self.geom_type == 'line_segment':
-            return Line2D(self.pnt_1, self.pnt_2).angle
-        x1, y1 = self.pnt_1.coords
-        x2, y2 = self.pnt_2.coords
-        x3, y3 = self.bezier_control_point.coords
-        dx_dt = -4*(x3-x1)*t + 2*(x3-x1) - 2*t*x1 + 2*t*x2
-        dy_dt = -4*(y3-y1)*t + 2*(y3-y1) - 2*t*y1 + 2*t*y2
-        pnt = self.point_by_param(t)
-        pnt_direction = Point2D(pnt.x + dx_dt, pnt.y + dy_dt)
-        return Line2D(pnt, pnt_direction).angle
+        return self.angles_by_params([t])[0]
+
+    def angles_by_params(self, t) -> AngleArray:
+        """ tangent directions for array of t, control point is evaluated once """
+        t = np.clip(np.asarray(t, dtype=float).reshape(-1), 0, 1)
+        control_points = self.control_points
+        degree = len(control_points) - 1
+        derivative = bernstein(t, degree - 1) @ (degree * np.diff(control_points, axis=0))
+        return AngleArray(np.arctan2(derivative[:, 1], derivative[:, 0]))
 
     def t_division_bounded_by_angle(self):
         if self.geom_type == 'line_segment':
@@ -485,18 +765,14 @@ class BoundedCurve(GeometryPrimitive):
         current_step = nominal_step
         while True:
             t = division[-1]
-            next_t = t + current_step
-            angle_t = self.angle_by_param(t)
-            angle_t_delta_t = self.angle_by_param(next_t)
-            if abs(Angle(angle_t.free_angle - angle_t_delta_t.free_angle).angle_0_2pi) > 1e2*ANGLE_EQUAL_VIEW_PRECISION:
-                current_step = current_step/2
-                continue
-            else:
-                if current_step < nominal_step:
-                    current_step *= 2
-                else:
-                    current_step = nominal_step
-                division.append(next_t)
+            # all halvings of step are checked at once, the longest one with small enough turn is taken
+            steps = current_step * DIVISION_STEP_HALVINGS
+            angles = self.angles_by_params(np.concatenate(([t], t + steps)))
+            turns = np.abs(angle_array_rad_difference(angles[1:], angles[:1]))
+            step = longest_allowed_step(steps, turns <= 1e2*ANGLE_EQUAL_VIEW_PRECISION)
+            next_t = t + step
+            current_step = 2*step if step < nominal_step else nominal_step
+            division.append(next_t)
             if 1-next_t < nominal_step/10:
                 break
         if division[-1] > 1:
@@ -509,16 +785,30 @@ class BoundedCurve(GeometryPrimitive):
         else:
             return 'bezier', *self.pnt_1.coords, *self.bezier_control_point.coords, *self.pnt_2.coords
 
+    @property
+    def control_points(self) -> np.ndarray:
+        """ (2, 2) for line segment, (3, 2) for quadratic bezier """
+        if self.geom_type == 'line_segment':
+            return np.array([self.pnt_1.coords, self.pnt_2.coords])
+        return np.array([self.pnt_1.coords, self.bezier_control_point.coords, self.pnt_2.coords])
+
+    @property
+    def arc_length_table(self) -> ArcLengthTable:
+        """ evaluated on first use """
+        if self._arc_length_table is None:
+            self._arc_length_table = ArcLengthTable(self.control_points)
+        return self._arc_length_table
+
     @property
     def approximate_length(self):
-        approx_length = 0
-        last_point = self.point_by_param(0)
-        for i in range(100):
-            next_point = self.point_by_param((i+1)/100)
-            approx_length += distance_point_to_point(next_point, last_point)
-            last_point = next_point
-        print("approx length = ", approx_length)
-        return approx_length
+        return self.arc_length_table.length
+
+    def point_by_length(self, length: Real) -> Point2D:
+        """ point on given arc length from pnt_1 """
+        return Point2D(*self.arc_length_table.point_at(length))
+
+    def angle_by_length(self, length: Real) -> Angle:
+        return Angle(self.arc_length_table.angle_at(length))
 
     def points_of_equidistant_container(self, width: Real) -> list[Point2D]:
         """ implement 2-stage algorithm
@@ -534,39 +824,31 @@ class BoundedCurve(GeometryPrimitive):
         current_step = nominal_step
         while True:
             t = division[-1]
-            next_t = t + current_step
-            if next_t > 1:
-                next_t = 1
-            distance_ = distance_point_to_point(self.point_by_param(t), self.point_by_param(next_t))
-            if distance_ > hw:
-                current_step /= 2
-                continue
-            else:
-                current_step = nominal_step
-                division.append(next_t)
+            # all halvings of step are checked at once, the longest one with short enough chord is taken
+            next_ts = np.minimum(t + current_step * DIVISION_STEP_HALVINGS, 1)
+            points = self.points_by_params(np.concatenate(([t], next_ts)))
+            next_t = longest_allowed_step(next_ts, points[1:].distances(points[0]) <= hw)
+            division.append(next_t)
             if next_t == 1:
                 break
         print("division: len = {}, elements = {}".format(len(division),  division))
 
-        normal_angles = []
-        for t in division:
-            normal_angle = self.angle_by_param(t) + math.pi / 2
-            normal_angles.append(normal_angle)
+        normal_angles = list(self.angles_by_params(division) + math.pi / 2)
         print("normal_angles elements = {}".format(normal_angles))
 
         last_current_next_points = []
         div_length = len(division)
-        for i, t in enumerate(division):
-            point = self.point_by_param(t)
+        division_points = list(self.points_by_params(division))
+        for i, point in enumerate(division_points):
             if i == 0:
-                next_point = self.point_by_param(division[i+1])
+                next_point = division_points[i+1]
                 last_point = point_mirror(next_point, point)
             elif i == (div_length-1):
-                last_point = self.point_by_param(division[i-1])
+                last_point = division_points[i-1]
                 next_point = point_mirror(last_point, point)
             else:
-                last_point = self.point_by_param(division[i-1])
-                next_point = self.point_by_param(division[i+1])
+                last_point = division_points[i-1]
+                next_point = division_points[i+1]
             last_current_next_points.append((last_point, point, next_point))
         print("last_current_next_points = {}".format(last_current_next_points))
 
@@ -838,6 +1120,119 @@ class BaseFrame(Frame):
 
 
 if __name__ == '__main__':
+    test_5 = True
+    if test_5:
+        # arrays give the same results as points and angles one by one
+        rng = np.random.default_rng(0)
+        points = [Point2D(*coords) for coords in rng.uniform(-10, 10, (50, 2))]
+        angles = [Angle(free_angle) for free_angle in rng.uniform(-10, 10, 50)]
+        point_array, angle_array = PointArray(points), AngleArray(angles)
+        shifted = point_array + Point2D(1, 2) - point_array[0]
+        assert all(shifted[i] == points[i] + Point2D(1, 2) - points[0] for i in range(50))
+        assert all((point_array * 3)[i] == points[i] * 3 for i in range(50))
+        assert np.all(point_array == PointArray(point_array.coords + 0.1 * COORD_EQUAL_PRECISION))
+        assert not np.any(point_array == point_array + Point2D(10 * COORD_EQUAL_PRECISION, 0))
+        assert np.allclose((angle_array + 1).angle_0_2pi, [(angle + 1).angle_0_2pi for angle in angles])
+        assert np.allclose(angle_array.angle_mpi2_ppi2, [angle.angle_mpi2_ppi2 for angle in angles])
+        assert list(angle_array == angle_array[::-1]) == [angle == other for angle, other in zip(angles, angles[::-1])]
+        for real in [angles[3].angle_mpi2_ppi2, angles[3].angle_mpi2_ppi2 + math.pi, 7.]:
+            # real out of (-pi/2, pi/2] is compared as is
+            assert list(angle_array == real) == [angle == real for angle in angles]
+        assert np.allclose(angle_array_rad_difference(angle_array, angle_array[::-1]),
+                           [angle_rad_difference(angle, other) for angle, other in zip(angles, angles[::-1])])
+
+    test_6 = True
+    if test_6:
+        # batched line kernels give the same results as line functions one by one
+        rng = np.random.default_rng(1)
+        lines_1 = [Line2D(Point2D(*rng.uniform(-10, 10, 2)), angle=Angle(rng.uniform(-3, 3))) for _ in range(30)]
+        lines_2 = [Line2D(Point2D(*rng.uniform(-10, 10, 2)), angle=Angle(rng.uniform(-3, 3))) for _ in range(30)]
+        lines_2[0] = Line2D(Point2D(0, 5), angle=lines_1[0].angle)
+        lines_2[1] = Line2D(lines_1[1].any_point_on_line, angle=lines_1[1].angle + math.pi)
+        intersections, parallel, equivalent = lines_intersections(line_coefficients(lines_1),
+                                                                  line_coefficients(lines_2))
+        assert parallel[0] and equivalent[1] and not np.any(parallel[2:] | equivalent[2:])
+        for line_1, line_2, intersection in list(zip(lines_1, lines_2, intersections))[2:]:
+            assert lines_intersection(line_1, line_2) == Point2D(*intersection)
+        test_points = PointArray(rng.uniform(-10, 10, (30, 2)))
+        foot_points = normal_foot_points(test_points, line_coefficients(lines_1))
+        distances = normal_distances(test_points, line_coefficients(lines_1))
+        for pnt, line, foot_point, distance in zip(test_points, lines_1, foot_points, distances):
+            assert normal(pnt, line)[1] == Point2D(*foot_point)
+            assert abs(normal_distance(pnt, line) - distance) < COORD_EQUAL_PRECISION
+        assert np.all(normal_distances(foot_points, normal_lines(test_points, line_coefficients(lines_1))) <
+                      COORD_EQUAL_PRECISION)
+
+    test_7 = True
+    if test_7:
+        # closed form max curvature and optimal bezier agree with per-t and per-angle cut_optimization of baseline:
+        # max curvature within relative 1e-3 and its t within 1e-3, optimal angle within ANGLE_EQUAL_VIEW_PRECISION
+        def baseline_bezier_curvature(t: Real, pnt_1: Point2D, pnt_2: Point2D, pnt_control: Point2D):
+            x1, y1 = pnt_1.coords
+            x2, y2 = pnt_2.coords
+            x3, y3 = pnt_control.coords
+            return abs(0.5 * (-(2 * (x3 - x1) + x1 - x2) * (2 * (y3 - y1) * t - (y3 - y1) + t * y1 - t * y2) +
+                              (2 * (y3 - y1) + y1 - y2) * (2 * (x3 - x1) * t - (x3 - x1) + t * x1 - t * x2)) *
+                       ((2 * (x3 - x1) * t - (x3 - x1) + t * x1 - t * x2) ** 2 + (
+                               2 * (y3 - y1) * t - (y3 - y1) + t * y1 - t * y2) ** 2) ** (-1.5))
+
+        def searched_max_curvature(curve: BoundedCurve, float_angle: float) -> tuple[float, float]:
+            """ t and value of max curvature as baseline BoundedCurve.max_curvature """
+            pnt_intersect = lines_intersection(Line2D(curve.pnt_1, angle=curve.angle_1),
+                                               Line2D(curve.pnt_2, angle=Angle(float_angle)))
+            return cut_optimization(baseline_bezier_curvature, curve.pnt_1, curve.pnt_2, pnt_intersect,
+                                    borders=(0, 1), maxormin=CEMaxMin('max'))
+
+        rng = np.random.default_rng(2)
+        for _ in range(10):
+            curve = BoundedCurve(Point2D(*rng.uniform(-10, 10, 2)), Point2D(*rng.uniform(-10, 10, 2)),
+                                 Angle(rng.uniform(-3, 3)))
+            float_angles = curve.angle_1.angle_mpi2_ppi2 + rng.uniform(0.1, 3, 20)
+            intersections = lines_intersections(
+                np.tile(line_coefficients([Line2D(curve.pnt_1, angle=curve.angle_1)]), (len(float_angles), 1)),
+                line_coefficients([Line2D(curve.pnt_2, angle=Angle(float_angle)) for float_angle in float_angles]))[0]
+            closed_form_t, closed_form = bezier_max_curvature_array(*curve.pnt_1.coords, *curve.pnt_2.coords,
+                                                                    intersections[:, 0], intersections[:, 1])
+            assert np.allclose(curve.max_curvatures(float_angles), closed_form)
+            for float_angle, t_max, value in zip(float_angles, closed_form_t, closed_form):
+                # search undershoots sharp maxima a bit, closed form is exact
+                searched_t, searched = searched_max_curvature(curve, float_angle)
+                assert value >= searched * (1 - 1e-12) and value - searched <= 1e-3 * value
+                assert abs(t_max - searched_t) <= 1e-3
+            float_angle_1 = curve.angle_1.angle_mpi2_ppi2
+            angle_between_points = Line2D(curve.pnt_1, curve.pnt_2).angle.angle_mpi2_ppi2
+            min_angle, max_angle = sorted((angle_between_points, float_angle_1))
+            first, second = [cut_optimization(lambda x: searched_max_curvature(curve, x)[1], borders=borders)
+                             for borders in [(min_angle + ANGLE_EQUAL_VIEW_PRECISION,
+                                              max_angle - ANGLE_EQUAL_VIEW_PRECISION),
+                                             (max_angle + ANGLE_EQUAL_VIEW_PRECISION,
+                                              min_angle + math.pi - ANGLE_EQUAL_VIEW_PRECISION)]]
+            reference_angle = Angle(first[0]) if first[1] < second[1] else Angle(second[0])
+            assert abs(angle_rad_difference(curve.angle_2, reference_angle)) < ANGLE_EQUAL_VIEW_PRECISION
+            assert (curve.max_curvature(curve.angle_2.angle_mpi2_ppi2) <=
+                    curve.max_curvature(reference_angle.angle_mpi2_ppi2) * (1 + 1e-9))
+
+    test_8 = True
+    if test_8:
+        # array evaluation of points and tangents agrees with arc length table, divisions are bounded
+        t_ = np.linspace(-0.1, 1.1, 25)
+        for curve in [BoundedCurve(Point2D(1, 1), Point2D(3, 1)),
+                      BoundedCurve(Point2D(1, 1), Point2D(3, 1), Angle(math.pi / 4)),
+                      BoundedCurve(Point2D(1, 1), Point2D(3, 1), Angle(-math.pi / 4)),
+                      BoundedCurve(Point2D(1, 1), Point2D(3, 1), Angle(math.pi / 4), Angle(math.pi / 2))]:
+            points, angles = curve.points_by_params(t_), curve.angles_by_params(t_)
+            assert np.all(points == PointArray(curve.arc_length_table.point(np.clip(t_, 0, 1))))
+            assert all(curve.point_by_param(t) == pnt and curve.angle_by_param(t) == angle
+                       for t, pnt, angle in zip(t_, points, angles))
+            division = curve.t_division_bounded_by_angle()
+            assert division[0] == 0 and division[-1] == 1 and np.all(np.diff(division) > 0)
+            division_angles = curve.angles_by_params(division)
+            turns = angle_array_rad_difference(division_angles[1:], division_angles[:-1])
+            assert np.all(np.abs(turns) <= 1e2 * ANGLE_EQUAL_VIEW_PRECISION)
+        # no allowed step gives the smallest one, not the largest
+        assert longest_allowed_step(DIVISION_STEP_HALVINGS, DIVISION_STEP_HALVINGS < 0.3) == 0.25
+        assert longest_allowed_step(DIVISION_STEP_HALVINGS, DIVISION_STEP_HALVINGS < 0) == DIVISION_STEP_HALVINGS[-1]
+
     test_1 = False
     if test_1:
         p1 = Point2D(10, 20)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import bisect
+import functools
+import json
+import threading
+import time
+from typing import Callable
+
+""" Metrics of connector curve optimization
+Per operation: calls, total latency and latency histogram, nfev, converged / not converged calls (stopped by
+time budget) and where result came from (table, cache, store, optimization), which gives cache hit rates.
+Disabled by default, then instrumented functions cost one flag check per call,
+so only solver entry points are instrumented, not objectives in their inner loops """
+
+METRICS_ENABLED = False
+METRICS_LATENCY_BUCKETS = (1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 1e-1, 3e-1, 1.)  # upper bounds, seconds
+
+
+class OperationMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.
+        self.max_time = 0.
+        self.histogram = [0] * (len(METRICS_LATENCY_BUCKETS) + 1)  # last bucket is over last bound
+        self.nfev = 0
+        self.converged = 0
+        self.not_converged = 0
+        self.sources: dict[str, int] = {}
+
+    def record(self, elapsed: float, nfev: int = None, converged: bool = None, source: str = None):
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.histogram[bisect.bisect_left(METRICS_LATENCY_BUCKETS, elapsed)] += 1
+        if nfev is not None:
+            self.nfev += nfev
+        if converged is not None:
+            if converged:
+                self.converged += 1
+            else:
+                self.not_converged += 1
+        if source is not None:
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "total_time": self.total_time,
+                "mean_time": self.total_time / self.calls if self.calls else 0., "max_time": self.max_time,
+                "histogram": dict(zip([str(bound) for bound in METRICS_LATENCY_BUCKETS] + ["inf"], self.histogram)),
+                "nfev": self.nfev, "mean_nfev": self.nfev / self.calls if self.calls else 0.,
+                "converged": self.converged, "not_converged": self.not_converged,
+                "sources": dict(self.sources),
+                "hit_rate": (1 - self.sources.get("optimization", 0) / sum(self.sources.values()))
+                if self.sources else None}
+
+
+class OptimizerMetrics:
+    def __init__(self):
+        self._operations: dict[str, OperationMetrics] = {}
+        self._lock = threading.Lock()  # operations are recorded from connector solver threads too
+
+    def record(self, name: str, elapsed: float, nfev: int = None, converged: bool = None, source: str = None):
+        with self._lock:
+            if name not in self._operations:
+                self._operations[name] = OperationMetrics()
+            self._operations[name].record(elapsed, nfev, converged, source)
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def snapshot(self) -> dict:
+        """ operation metrics and deltas cache statistics """
+        from deltas_cache import DELTAS_CACHE
+        with self._lock:
+            operations = {name: operation.as_dict() for name, operation in self._operations.items()}
+        return {"enabled": METRICS_ENABLED, "operations": operations, "deltas_cache": DELTAS_CACHE.stats()}
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+
+    def report(self) -> str:
+        lines = ["{:<28} {:>8} {:>10} {:>10} {:>10} {:>9} {:>9}".format(
+            "operation", "calls", "total, s", "mean, ms", "max, ms", "mean nfev", "hit rate")]
+        for name, operation in self.snapshot()["operations"].items():
+            lines.append("{:<28} {:>8} {:>10.4f} {:>10.4f} {:>10.4f} {:>9.1f} {:>9}".format(
+                name, operation["calls"], operation["total_time"], operation["mean_time"] * 1e+3,
+                operation["max_time"] * 1e+3, operation["mean_nfev"],
+                "-" if operation["hit_rate"] is None else "{:.1%}".format(operation["hit_rate"])))
+        return "\n".join(lines)
+
+
+OPTIMIZER_METRICS = OptimizerMetrics()
+
+
+def enable_metrics(enabled: bool = True):
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+
+RESULT_SOURCES = ("table", "cache", "store", "optimization")
+
+
+def result_source(res) -> str:
+    """ source field of OptimizeResult set where it is created (one of RESULT_SOURCES),
+    results without it are from optimization """
+    return res.get("source", "optimization")
+
+
+def timed(name: str, result_info: Callable = None):
+    """ decorator recording latency of function under name,
+    result_info(result) returns dict of nfev, converged and source for record """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                return func(*args, **kwargs)
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start_time
+            OPTIMIZER_METRICS.record(name, elapsed, **(result_info(result) if result_info is not None else {}))
+            return result
+        return wrapper
+    return decorator
+
+
+def optimize_result_info(res) -> dict:
+    return {"nfev": int(res.get("nfev", 0)), "converged": not res.get("deadline_exceeded", False)}
+
+
+def solve_result_info(res) -> dict:
+    return dict(optimize_result_info(res), source=result_source(res))